@@ -0,0 +1,60 @@
+# -*- mode: python ; coding: utf-8 -*-
+
+# Perfil de arranque rápido para las cajas: pyinstaller main_onedir.spec
+# - onedir: dist/main/ queda instalado; el exe no se descomprime en %TEMP%
+#   en cada arranque como el onefile de main.spec.
+# - optimize=1: el bytecode ya va compilado con -O (sin asserts) dentro del PYZ.
+# - Sin UPX: las DLL de Qt comprimidas se descomprimen al cargar y el antivirus
+#   las vuelve a escanear en cada arranque.
+# - excludes: módulos que la app nunca usa y que los hooks podrían arrastrar.
+
+a = Analysis(
+    ['src\\main.py'],
+    pathex=['src'],
+    binaries=[],
+    datas=[('src/loading.gif', '.')],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=[
+        'tkinter',
+        'unittest',
+        'pydoc',
+        'PyQt6.QtQml',
+        'PyQt6.QtQuick',
+        'PyQt6.QtNetwork',
+        'PyQt6.QtMultimedia',
+        'PyQt6.QtWebEngineCore',
+    ],
+    noarchive=False,
+    optimize=1,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='main',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='main',
+)
@@ -4,6 +4,7 @@ from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton
 from PyQt6.QtGui import QFont, QGuiApplication
 from PyQt6.QtCore import Qt
 from src.open_cash_register_worker import OpenCashRegisterWorker
+from src.sales_ledger import open_session
 
 # Si utilizas un diálogo de carga, asegúrate de importarlo.
 from src.loading_dialog import MaterialLoadingDialog  # O el nombre que utilices
@@ -11,6 +12,7 @@ from src.loading_dialog import MaterialLoadingDialog  # O el nombre que utilices
 class AperturaCajaWindow(QWidget):
     def __init__(self):
         super().__init__()
+        self.worker = None  # Tarea de red en curso (ver network_engine.py)
 
         self.setWindowTitle("Apertura de Caja")
         self.setFixedSize(400, 300)
@@ -77,6 +79,9 @@ class AperturaCajaWindow(QWidget):
         self.move(center_x, center_y)
 
     def confirm(self):
+        if self.worker is not None and self.worker.isRunning():
+            return  # Ya hay una petición en curso (doble clic)
+
         monto_texto = self.amount_input.text().strip()
         try:
             monto = float(monto_texto)
@@ -104,6 +109,9 @@ class AperturaCajaWindow(QWidget):
         else:
             # Se asume que la respuesta contiene un mensaje de éxito.
             message = result.get("message", "Caja abierta correctamente.")
+
+            # Sesión local para acumular los totales de venta hasta el cierre
+            open_session(self.worker.opening_amount, server_id=result.get("id"))
             QMessageBox.information(self, "Éxito", message)
 
             # Luego de abrir la caja, se abre la ventana del POS.
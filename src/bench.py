@@ -0,0 +1,304 @@
+# bench.py
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.mock_api import (
+    MockConfig, MOCK_EMAIL_DOMAIN, synthetic_catalog, start_server, stop_server, login_till
+)
+
+############################################
+# Benchmarks de los caminos críticos
+############################################
+# Uso (desde la raíz del repo):
+#   python -m src.bench --sizes 1000,100000 --out bench.json
+#   python -m src.bench --sizes 1000,100000 --baseline bench_base.json
+#   python -m src.bench --compare bench_base.json bench.json
+#
+# Cada tamaño de catálogo y repetición corre en un subproceso propio dentro
+# de un directorio temporal (la base, el snapshot y los tokens usan rutas
+# relativas), así nada se mezcla entre corridas ni toca los archivos reales.
+# - Fase "local": init_db, save_products, get_product_by_barcode (SQLite y
+#   snapshot, aciertos y fallos), get_products_by_barcodes, Cart y record_sale.
+# - Fase "sync": sync_all_products contra mock_api.py en la dirección de
+#   API_BASE_URL (el puerto tiene que estar libre).
+# La salida es JSON: por tamaño y métrica, percentiles en milisegundos.
+# --compare / --baseline marcan regresiones cuando p50 o p95 empeoran más que
+# --threshold (por defecto 20 %); el código de salida es 1 si hay alguna.
+
+DEFAULT_SIZES = "1000,10000,100000"
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.20
+LOOKUP_SAMPLES = 5000        # Búsquedas medidas por tipo y repetición
+CART_LINES = 200             # Productos distintos en el carrito de prueba
+SALE_LINES = (5, 20, 100)    # Tamaños de venta para record_sale
+MIN_COMPARABLE_MS = 0.005    # Por debajo de esto la diferencia es ruido del reloj
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def missing_barcode(i: int) -> str:
+    return f"{9900000000000 + i:013d}"
+
+
+############################################
+# Medición
+############################################
+def _timed(fn, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def _samples(fn, items) -> list:
+    """Mide fn(item) para cada item; retorna los segundos de cada llamada."""
+    results = []
+    clock = time.perf_counter
+    for item in items:
+        start = clock()
+        fn(item)
+        results.append(clock() - start)
+    return results
+
+
+def percentiles(samples: list) -> dict:
+    """{'n', 'mean_ms', 'min_ms', 'p50_ms', 'p90_ms', 'p95_ms', 'p99_ms', 'max_ms'}"""
+    values = sorted(samples)
+    n = len(values)
+
+    def at(q):
+        return round(values[min(n - 1, int(q * n))] * 1000, 4)
+
+    return {
+        "n": n,
+        "mean_ms": round(sum(values) / n * 1000, 4),
+        "min_ms": round(values[0] * 1000, 4),
+        "p50_ms": at(0.50),
+        "p90_ms": at(0.90),
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+        "max_ms": round(values[-1] * 1000, 4)
+    }
+
+
+############################################
+# Fase "local" (base, búsquedas, carrito, venta)
+############################################
+def run_local_phase(size: int, seed: int) -> dict:
+    from src.local_db import init_db, save_products, get_product_by_barcode, get_products_by_barcodes
+    from src.migrations import apply_migrations
+    from src.db_connection import get_connection
+    from src import catalog_snapshot
+    from src.cart import Cart
+    from src.sales_ledger import record_sale
+
+    results = {}
+    results["init_db.cold"] = [_timed(init_db)]
+    results["init_db.migrated"] = [_timed(apply_migrations, get_connection())]
+
+    catalog = synthetic_catalog(size, seed)
+    results["save_products.insert"] = [_timed(save_products, catalog)]
+    results["save_products.unchanged"] = [_timed(save_products, catalog)]
+    # 1 % de precios nuevos: el caso típico de una sincronización
+    rnd = random.Random(seed)
+    changed = [dict(p, unit_price=p["unit_price"] + 1) for p in rnd.sample(catalog, max(1, size // 100))]
+    results["save_products.update_1pct"] = [_timed(save_products, changed)]
+
+    hits = [p["barcode"] for p in rnd.choices(catalog, k=LOOKUP_SAMPLES)]
+    misses = [missing_barcode(i) for i in range(LOOKUP_SAMPLES)]
+    catalog_snapshot.invalidate()  # Sin snapshot: get_product_by_barcode va a SQLite
+    results["lookup.sqlite.hit"] = _samples(get_product_by_barcode, hits)
+    results["lookup.sqlite.miss"] = _samples(get_product_by_barcode, misses)
+
+    results["snapshot.write"] = [_timed(catalog_snapshot.write_snapshot)]
+    results["lookup.snapshot.hit"] = _samples(get_product_by_barcode, hits)
+    results["lookup.snapshot.miss"] = _samples(get_product_by_barcode, misses)
+
+    batches = [hits[i:i + 50] for i in range(0, len(hits), 50)]
+    results["lookup.batch50"] = _samples(get_products_by_barcodes, batches)
+
+    # Carrito: líneas nuevas, incrementos (re-escaneo) y lectura del total
+    products = [get_product_by_barcode(code) for code in hits[:CART_LINES]]
+    cart = Cart()
+    results["cart.add_new"] = _samples(cart.add, products)
+    results["cart.increment"] = _samples(cart.add, products)
+    results["cart.total"] = _samples(lambda _: cart.total_cents, range(LOOKUP_SAMPLES))
+    results["cart.clear"] = [_timed(cart.clear)]
+
+    # Venta: armado del payload + libro local + outbox en una transacción
+    for lines in SALE_LINES:
+        sale_cart = Cart()
+        for product in products[:lines]:
+            sale_cart.add(product, 2)
+        results[f"sale.record_{lines}_lines"] = _samples(
+            lambda _: record_sale(sale_cart.lines()), range(20)
+        )
+    return results
+
+
+############################################
+# Fase "sync" (contra una API falsa)
+############################################
+def run_sync_phase(size: int, seed: int) -> dict:
+    from src.local_db import init_db
+    from src.sync import sync_all_products
+
+    server, _ = start_server(MockConfig(products=size, seed=seed))
+    try:
+        login_till("bench@" + MOCK_EMAIL_DOMAIN)
+        init_db()
+        return {
+            "sync.full": [_timed(sync_all_products)],
+            "sync.delta_noop": [_timed(sync_all_products)]
+        }
+    finally:
+        stop_server(server)
+
+
+PHASES = {"local": run_local_phase, "sync": run_sync_phase}
+
+
+def _run_worker(phase: str, size: int, seed: int, result_file: str):
+    """Punto de entrada del subproceso: los módulos de la app imprimen a stdout, el resultado va a un archivo."""
+    results = PHASES[phase](size, seed)
+    with open(result_file, "w", encoding="utf-8") as f:
+        json.dump(results, f)
+
+
+def _spawn(phase: str, size: int, seed: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix=f"posbench-{phase}-") as workdir:
+        result_file = os.path.join(workdir, "result.json")
+        env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        proc = subprocess.run(
+            [sys.executable, "-m", "src.bench", "--worker", phase,
+             "--size", str(size), "--seed", str(seed), "--result-file", result_file],
+            cwd=workdir, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"Falló la fase {phase} con {size} productos:\n{proc.stdout[-2000:]}")
+        with open(result_file, encoding="utf-8") as f:
+            return json.load(f)
+
+
+def run_suite(sizes: list, repeat: int, phases: list, seed: int = 0) -> dict:
+    report = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "seed": seed
+        },
+        "results": {}
+    }
+    for size in sizes:
+        merged = {}
+        for round_no in range(repeat):
+            for phase in phases:
+                print(f"[bench] {size} productos, fase {phase}, repetición {round_no + 1}/{repeat}...",
+                      file=sys.stderr)
+                for metric, samples in _spawn(phase, size, seed).items():
+                    merged.setdefault(metric, []).extend(samples)
+        report["results"][str(size)] = {metric: percentiles(samples) for metric, samples in sorted(merged.items())}
+    return report
+
+
+############################################
+# Comparación contra una línea base
+############################################
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> list:
+    """
+    Retorna una fila por métrica presente en ambos reportes:
+    {'size', 'metric', 'stat', 'baseline_ms', 'current_ms', 'change', 'regression'}.
+    """
+    rows = []
+    for size, metrics in current.get("results", {}).items():
+        base_metrics = baseline.get("results", {}).get(size, {})
+        for metric, stats in metrics.items():
+            base = base_metrics.get(metric)
+            if not base:
+                continue
+            for stat in ("p50_ms", "p95_ms"):
+                before, after = base[stat], stats[stat]
+                change = (after - before) / before if before > 0 else 0.0
+                rows.append({
+                    "size": size,
+                    "metric": metric,
+                    "stat": stat,
+                    "baseline_ms": before,
+                    "current_ms": after,
+                    "change": round(change, 4),
+                    "regression": change > threshold and after - before > MIN_COMPARABLE_MS
+                })
+    return rows
+
+
+def print_comparison(rows: list, threshold: float):
+    regressions = [row for row in rows if row["regression"]]
+    for row in rows:
+        flag = "REGRESIÓN" if row["regression"] else ""
+        print(f"{row['size']:>8} {row['metric']:<28} {row['stat']:<7} "
+              f"{row['baseline_ms']:>11.4f} -> {row['current_ms']:>11.4f} ms "
+              f"{row['change'] * 100:+7.1f} % {flag}", file=sys.stderr)
+    print(f"{len(regressions)} regresiones (umbral {threshold * 100:.0f} %).", file=sys.stderr)
+    return regressions
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.bench", description="Benchmarks del POS.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Tamaños de catálogo, separados por coma.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--phases", default="local,sync", help="Fases a correr: local, sync.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--baseline", help="Reporte JSON contra el que comparar esta corrida.")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="Sólo comparar dos reportes ya guardados.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Empeoramiento relativo que cuenta como regresión (0.2 = 20 %%).")
+    parser.add_argument("--worker", choices=sorted(PHASES), help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        _run_worker(args.worker, args.size, args.seed, args.result_file)
+        return 0
+
+    if args.compare:
+        rows = compare(_load(args.compare[0]), _load(args.compare[1]), args.threshold)
+        return 1 if print_comparison(rows, args.threshold) else 0
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    phases = [phase.strip() for phase in args.phases.split(",") if phase.strip()]
+    report = run_suite(sizes, args.repeat, phases, args.seed)
+
+    regressions = []
+    if args.baseline:
+        rows = compare(_load(args.baseline), report, args.threshold)
+        report["comparison"] = {"baseline": args.baseline, "threshold": args.threshold, "rows": rows}
+        regressions = print_comparison(rows, args.threshold)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
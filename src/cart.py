@@ -0,0 +1,171 @@
+# cart.py
+
+from decimal import Decimal, ROUND_HALF_UP
+
+############################################
+# Carrito de la venta en curso (sin Qt)
+############################################
+# Estado del carrito independiente de la interfaz:
+# - Índices por código de barras y por id de producto: buscar una línea es O(1).
+# - Montos en centavos (int); el total se ajusta en cada operación en vez de
+#   recorrer todas las líneas.
+# - La interfaz (cart_model.CartTableModel) sólo observa los eventos.
+#
+# Eventos para los listeners, callback(evento, fila):
+#   "before_insert" / "insert"   línea nueva en 'fila' (siempre al final)
+#   "change"                     cambió la cantidad de 'fila'
+#   "before_remove" / "remove"   se elimina 'fila'
+#   "before_reset" / "reset"     se vació el carrito (fila = -1)
+
+MAX_QUANTITY = 9999
+
+
+def price_to_cents(price) -> int:
+    """Precio (float, str o Decimal) a centavos, redondeando 0.5 hacia arriba."""
+    return int((Decimal(str(price)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+class Cart:
+    """
+    Líneas: {'product_id', 'barcode', 'name', 'unit_price', 'unit_price_cents',
+             'quantity', 'line_total_cents'}.
+    """
+
+    def __init__(self):
+        self._lines = []
+        self._row_by_id = {}
+        self._row_by_barcode = {}
+        self._total_cents = 0
+        self._units = 0
+        self._listeners = []
+
+    ############################################
+    # Observadores
+    ############################################
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, event: str, row: int):
+        for callback in self._listeners:
+            callback(event, row)
+
+    ############################################
+    # Consultas
+    ############################################
+    def __len__(self):
+        return len(self._lines)
+
+    def line(self, row: int) -> dict:
+        """Línea en 'row' (no modificarla; usar set_quantity / remove)."""
+        return self._lines[row]
+
+    def lines(self) -> list:
+        """Copia de las líneas, en el orden en que se agregaron."""
+        return [dict(line) for line in self._lines]
+
+    def find(self, barcode: str = None, product_id: int = None) -> int | None:
+        """Fila de la línea con ese id o código de barras, o None."""
+        if product_id is not None:
+            return self._row_by_id.get(product_id)
+        if barcode is not None:
+            return self._row_by_barcode.get(barcode)
+        return None
+
+    @property
+    def total_cents(self) -> int:
+        return self._total_cents
+
+    @property
+    def total(self) -> float:
+        return self._total_cents / 100
+
+    @property
+    def units(self) -> int:
+        """Cantidad total de unidades (suma de cantidades)."""
+        return self._units
+
+    ############################################
+    # Operaciones
+    ############################################
+    def add(self, product: dict, quantity: int = 1) -> int:
+        """
+        Agrega 'quantity' unidades de 'product' ({'id', 'barcode', 'name', 'unit_price'}):
+        suma a la línea existente o crea una nueva. Retorna la fila.
+        """
+        product_id = product.get("id")
+        barcode = product.get("barcode") or None
+        row = self._row_by_id.get(product_id) if product_id is not None else None
+        if row is None and barcode is not None:
+            row = self._row_by_barcode.get(barcode)
+        if row is not None:
+            self.set_quantity(row, self._lines[row]["quantity"] + quantity)
+            return row
+
+        quantity = max(1, min(MAX_QUANTITY, int(quantity)))
+        price_cents = price_to_cents(product.get("unit_price") or 0)
+        line = {
+            "product_id": product_id,
+            "barcode": barcode,
+            "name": str(product.get("name", "")),
+            "unit_price": price_cents / 100,
+            "unit_price_cents": price_cents,
+            "quantity": quantity,
+            "line_total_cents": price_cents * quantity
+        }
+        row = len(self._lines)
+        self._notify("before_insert", row)
+        self._lines.append(line)
+        self._index(line, row)
+        self._total_cents += line["line_total_cents"]
+        self._units += quantity
+        self._notify("insert", row)
+        return row
+
+    def set_quantity(self, row: int, quantity: int) -> bool:
+        """Cambia la cantidad de 'row' (entre 1 y MAX_QUANTITY). Retorna si cambió."""
+        quantity = max(1, min(MAX_QUANTITY, int(quantity)))
+        line = self._lines[row]
+        if line["quantity"] == quantity:
+            return False
+        new_total = line["unit_price_cents"] * quantity
+        self._total_cents += new_total - line["line_total_cents"]
+        self._units += quantity - line["quantity"]
+        line["quantity"] = quantity
+        line["line_total_cents"] = new_total
+        self._notify("change", row)
+        return True
+
+    def remove(self, row: int):
+        line = self._lines[row]
+        self._notify("before_remove", row)
+        del self._lines[row]
+        self._unindex(line)
+        # Sólo las filas siguientes cambian de posición
+        for shifted in range(row, len(self._lines)):
+            self._index(self._lines[shifted], shifted)
+        self._total_cents -= line["line_total_cents"]
+        self._units -= line["quantity"]
+        self._notify("remove", row)
+
+    def clear(self):
+        self._notify("before_reset", -1)
+        self._lines = []
+        self._row_by_id = {}
+        self._row_by_barcode = {}
+        self._total_cents = 0
+        self._units = 0
+        self._notify("reset", -1)
+
+    def _index(self, line: dict, row: int):
+        if line["product_id"] is not None:
+            self._row_by_id[line["product_id"]] = row
+        if line["barcode"] is not None:
+            self._row_by_barcode[line["barcode"]] = row
+
+    def _unindex(self, line: dict):
+        self._row_by_id.pop(line["product_id"], None)
+        self._row_by_barcode.pop(line["barcode"], None)
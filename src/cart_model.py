@@ -0,0 +1,146 @@
+# cart_model.py
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent, pyqtSignal
+from PyQt6.QtWidgets import QStyledItemDelegate, QSpinBox, QStyle, QStyleOptionButton, QApplication
+from src.cart import Cart, MAX_QUANTITY
+
+############################################
+# Carrito: modelo + delegates para QTableView
+############################################
+# Antes cada línea creaba un QSpinBox y un QPushButton con setCellWidget y el
+# total se recalculaba leyendo "$..." de las celdas. Ahora las líneas y los
+# totales viven en Cart (cart.py, sin Qt), el modelo lo observa y la vista
+# sólo pinta las filas visibles:
+# - Cantidad: QuantityDelegate abre un QSpinBox sólo mientras se edita.
+# - Eliminar: DeleteButtonDelegate pinta el botón y atiende el clic, siempre
+#   sobre la fila actual (no sobre un índice capturado al crear la fila).
+# - Agregar o sumar 1 emite beginInsertRows o dataChanged sólo de esa fila.
+
+COL_BARCODE, COL_NAME, COL_PRICE, COL_QUANTITY, COL_ACTIONS = range(5)
+HEADERS = ["Código", "Descripción", "Precio", "Cantidad", "Acciones"]
+
+
+class CartTableModel(QAbstractTableModel):
+    """
+    Vista Qt de un Cart (cart.py): el estado y los totales viven en el carrito,
+    el modelo sólo traduce sus eventos a señales de Qt.
+    Emite 'total_changed(total)' cada vez que cambia el total.
+    """
+    total_changed = pyqtSignal(float)
+
+    def __init__(self, cart: Cart = None, parent=None):
+        super().__init__(parent)
+        self.cart = cart if cart is not None else Cart()
+        self.cart.subscribe(self._on_cart_event)
+
+    ############################################
+    # API de QAbstractTableModel
+    ############################################
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.cart)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        line = self.cart.line(index.row())
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == COL_BARCODE:
+                return line["barcode"] or ""
+            if column == COL_NAME:
+                return line["name"]
+            if column == COL_PRICE:
+                return f"${line['unit_price_cents'] / 100:.2f}"
+            if column == COL_QUANTITY:
+                return line["quantity"]
+        elif role == Qt.ItemDataRole.EditRole and column == COL_QUANTITY:
+            return line["quantity"]
+        elif role == Qt.ItemDataRole.TextAlignmentRole and column in (COL_PRICE, COL_QUANTITY):
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() == COL_QUANTITY:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.EditRole or index.column() != COL_QUANTITY:
+            return False
+        return self.cart.set_quantity(index.row(), int(value))
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if parent.isValid() or row < 0 or row + count > len(self.cart):
+            return False
+        for _ in range(count):
+            self.cart.remove(row)
+        return True
+
+    ############################################
+    # Eventos del carrito
+    ############################################
+    def _on_cart_event(self, event: str, row: int):
+        if event == "before_insert":
+            self.beginInsertRows(QModelIndex(), row, row)
+        elif event == "insert":
+            self.endInsertRows()
+        elif event == "change":
+            index = self.index(row, COL_QUANTITY)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole])
+        elif event == "before_remove":
+            self.beginRemoveRows(QModelIndex(), row, row)
+        elif event == "remove":
+            self.endRemoveRows()
+        elif event == "before_reset":
+            self.beginResetModel()
+        elif event == "reset":
+            self.endResetModel()
+
+        if not event.startswith("before_"):
+            self.total_changed.emit(self.cart.total)
+
+
+class QuantityDelegate(QStyledItemDelegate):
+    """QSpinBox como editor de la cantidad, creado sólo mientras se edita."""
+
+    def createEditor(self, parent, option, index):
+        editor = QSpinBox(parent)
+        editor.setRange(1, MAX_QUANTITY)
+        editor.setFrame(False)
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setValue(int(index.data(Qt.ItemDataRole.EditRole)))
+
+    def setModelData(self, editor, model, index):
+        editor.interpretText()
+        model.setData(index, editor.value(), Qt.ItemDataRole.EditRole)
+
+
+class DeleteButtonDelegate(QStyledItemDelegate):
+    """Pinta un botón "🗑" en la celda y elimina la fila al hacer clic."""
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(4, 2, -4, -2)
+        button.text = "🗑"
+        button.state = QStyle.StateFlag.State_Enabled
+        if option.state & QStyle.StateFlag.State_MouseOver:
+            button.state |= QStyle.StateFlag.State_MouseOver
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.Type.MouseButtonRelease and option.rect.contains(event.position().toPoint()):
+            model.removeRows(index.row(), 1)
+            return True
+        return False
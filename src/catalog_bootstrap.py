@@ -0,0 +1,180 @@
+# catalog_bootstrap.py
+
+import hashlib
+import os
+import sqlite3
+import zlib
+
+from src.constants import (
+    API_BASE_URL,
+    SNAPSHOT_MANIFEST_ENDPOINT,
+    SNAPSHOT_DOWNLOAD_FILE,
+    SNAPSHOT_CHUNK_SIZE
+)
+from src.utils import request_with_refresh
+from src import http_client
+from src.local_db import begin_staging, stage_products_from_db, commit_staging, discard_staging
+
+############################################
+# Carga inicial desde un snapshot SQLite
+############################################
+# En una caja nueva (o con products.db borrado) reconstruir el catálogo desde
+# JSON página por página tarda minutos. En su lugar se pide un manifiesto:
+#
+#   GET /products/snapshot ->
+#     { "url": "/products/snapshot/file" | "https://cdn/.../catalog.db.gz",
+#       "sha256": "<hash del archivo TAL COMO SE DESCARGA>",
+#       "size": 12345678,            (opcional, para el progreso)
+#       "compression": "gzip",       (o "none")
+#       "cursor": "..." }            (cursor para seguir con sincronizaciones delta)
+#
+# Se descarga en streaming, se descomprime al vuelo, se verifica el sha256 y
+# el archivo con PRAGMA quick_check, y se copia con ATTACH al staging que luego
+# se intercambia con products (ver local_db.commit_staging).
+# Una URL absoluta se descarga sin cabeceras de la API, así que un servidor de
+# archivos local (python -m http.server) sirve como reemplazo para pruebas.
+
+
+class SnapshotError(Exception):
+    """El snapshot no se pudo descargar o no pasó la verificación."""
+
+
+def fetch_manifest() -> dict | None:
+    """Retorna el manifiesto del snapshot, o None si la API no ofrece snapshots."""
+    response = request_with_refresh("GET", SNAPSHOT_MANIFEST_ENDPOINT)
+    if response.status_code in (404, 501):
+        return None
+    if response.status_code != 200:
+        raise SnapshotError(f"Error al pedir el manifiesto del snapshot. Código: {response.status_code}")
+    return response.json()
+
+
+def _open_download(url: str):
+    """Abre la descarga en streaming; las rutas relativas van autenticadas a la API."""
+    if url.startswith(API_BASE_URL):
+        url = url[len(API_BASE_URL):]
+    if url.startswith(("http://", "https://")):
+        return http_client.request("GET", url, stream=True)
+    return request_with_refresh("GET", url, stream=True)
+
+
+def download_snapshot(url: str, dest_path: str, expected_sha256: str,
+                      compression: str = "gzip", size: int = None,
+                      progress_callback=None, should_stop=None) -> str:
+    """
+    Descarga el snapshot a 'dest_path' en bloques, descomprimiendo al vuelo.
+    El sha256 se calcula sobre los bytes recibidos (antes de descomprimir).
+    'progress_callback(porcentaje, 100)' se llama a medida que avanza si se conoce el tamaño.
+    'should_stop()' se consulta entre bloques para cortar la descarga.
+    Retorna dest_path; lanza SnapshotError si algo falla o se canceló.
+    Sin 'expected_sha256' no se descarga nada: un snapshot sin verificar no se instala.
+    """
+    if not expected_sha256:
+        raise SnapshotError("El manifiesto del snapshot no trae sha256.")
+    response = _open_download(url)
+    if response.status_code != 200:
+        response.close()
+        raise SnapshotError(f"Error al descargar el snapshot. Código: {response.status_code}")
+
+    size = size or int(response.headers.get("Content-Length") or 0)
+    decompressor = zlib.decompressobj(wbits=31) if compression == "gzip" else None
+    digest = hashlib.sha256()
+    received = 0
+    last_pct = -1
+
+    tmp_path = f"{dest_path}.part"
+    try:
+        with response, open(tmp_path, "wb") as f:
+            # decode_content=False: hashear los bytes tal como vienen del servidor
+            for chunk in response.raw.stream(SNAPSHOT_CHUNK_SIZE, decode_content=False):
+                if should_stop and should_stop():
+                    raise SnapshotError("Descarga del snapshot cancelada.")
+                digest.update(chunk)
+                received += len(chunk)
+                f.write(decompressor.decompress(chunk) if decompressor else chunk)
+                if progress_callback and size:
+                    pct = min(100, received * 100 // size)
+                    if pct != last_pct:
+                        last_pct = pct
+                        progress_callback(pct, 100)
+            if decompressor:
+                f.write(decompressor.flush())
+                if not decompressor.eof:
+                    raise SnapshotError("El snapshot comprimido está incompleto.")
+
+        if digest.hexdigest() != expected_sha256.lower():
+            raise SnapshotError("El sha256 del snapshot no coincide con el manifiesto.")
+        os.replace(tmp_path, dest_path)
+    except (OSError, zlib.error) as e:
+        raise SnapshotError(f"Error al guardar el snapshot: {e}") from e
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return dest_path
+
+
+def verify_snapshot_db(path: str) -> str | None:
+    """
+    Verifica que el archivo sea una base SQLite sana con una tabla products usable.
+    Retorna el cursor guardado en su tabla meta (si tiene), o None.
+    """
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    except sqlite3.Error as e:
+        raise SnapshotError(f"El snapshot no es una base SQLite válida: {e}") from e
+    try:
+        if conn.execute("PRAGMA quick_check").fetchone()[0] != "ok":
+            raise SnapshotError("El snapshot no pasó PRAGMA quick_check.")
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(products)")}
+        missing = {"id", "barcode", "name", "unit_price"} - columns
+        if missing:
+            raise SnapshotError(f"Al snapshot le faltan columnas en products: {sorted(missing)}")
+        has_meta = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'meta'"
+        ).fetchone()
+        if has_meta:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'products_cursor'").fetchone()
+            return row[0] if row else None
+        return None
+    except sqlite3.DatabaseError as e:
+        raise SnapshotError(f"El snapshot está dañado: {e}") from e
+    finally:
+        conn.close()
+
+
+def install_snapshot(path: str) -> dict:
+    """Copia el snapshot verificado al staging y lo intercambia con el catálogo vivo."""
+    begin_staging()
+    try:
+        stage_products_from_db(path)
+        return commit_staging()
+    except Exception:
+        discard_staging()
+        raise
+
+
+def bootstrap_catalog(progress_callback=None, should_stop=None) -> tuple[dict, str | None] | None:
+    """
+    Carga el catálogo completo desde el snapshot de la API.
+    Retorna (contadores, cursor) o None si la API no ofrece snapshot.
+    """
+    manifest = fetch_manifest()
+    if not manifest or not manifest.get("url"):
+        return None
+
+    print(f"DEBUG: bootstrap_catalog() -> descargando snapshot {manifest['url']}")
+    path = download_snapshot(
+        manifest["url"],
+        SNAPSHOT_DOWNLOAD_FILE,
+        manifest.get("sha256"),
+        compression=manifest.get("compression", "gzip"),
+        size=manifest.get("size"),
+        progress_callback=progress_callback,
+        should_stop=should_stop
+    )
+    try:
+        cursor = verify_snapshot_db(path) or manifest.get("cursor")
+        stats = install_snapshot(path)
+    finally:
+        os.remove(path)
+    return stats, cursor
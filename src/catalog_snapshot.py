@@ -0,0 +1,249 @@
+# catalog_snapshot.py
+
+import mmap
+import os
+import struct
+import threading
+import time
+
+from src.constants import CATALOG_SNAPSHOT_FILE
+from src.db_connection import get_connection
+
+############################################
+# Formato del archivo (little-endian)
+############################################
+# [cabecera 40 bytes]
+#   magic(8) | formato(u32) | cantidad(u32) | ancho_barcode(u32) | reservado(u32) | generación(u64)
+#   | instancia(u64)
+# [barcodes]  cantidad * ancho_barcode bytes, UTF-8 rellenado con \0, ordenados
+# [registros] cantidad * (id i64 | precio_centavos i64 | offset_nombre u32 | largo_nombre u32)
+# [nombres]   UTF-8 concatenados
+#
+# El archivo es de sólo lectura y se reemplaza completo en cada sincronización,
+# por lo que varios procesos pueden mapearlo a la vez y compartir el page cache.
+# La 'instancia' y la 'generación' deben coincidir con meta.catalog_instance y
+# meta.catalog_generation de la base local (la generación sola se repite si se
+# recrea products.db); si no coinciden el snapshot se ignora y las búsquedas
+# vuelven a SQLite.
+
+MAGIC = b"POSCAT01"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<8sIIIIQQ")
+RECORD = struct.Struct("<qqII")
+
+# Cada cuánto se revisa en disco si otro proceso reemplazó el archivo
+STAT_INTERVAL_S = 0.25
+
+# Resultado de lookup() cuando el snapshot no se puede usar (no existe,
+# está desactualizado o corrupto). Distinto de None, que es "no existe el producto".
+UNAVAILABLE = object()
+
+
+def _read_version(conn) -> tuple[int, int]:
+    """(instancia, generación) del catálogo en la base local."""
+    values = dict(conn.execute(
+        "SELECT key, value FROM meta WHERE key IN ('catalog_instance', 'catalog_generation')"
+    ))
+    return int(values.get("catalog_instance", 0)), int(values.get("catalog_generation", 0))
+
+
+############################################
+# Escritura
+############################################
+def write_snapshot(path: str = CATALOG_SNAPSHOT_FILE) -> int:
+    """
+    Genera el snapshot a partir de la tabla products y lo reemplaza de forma atómica.
+    Retorna la cantidad de productos escritos.
+    """
+    conn = get_connection()
+    # Lectura consistente de productos + generación en una sola transacción
+    conn.execute("BEGIN")
+    try:
+        instance, generation = _read_version(conn)
+        rows = conn.execute(
+            "SELECT barcode, id, name, unit_price FROM products WHERE barcode IS NOT NULL"
+        ).fetchall()
+    finally:
+        conn.rollback()
+
+    entries = sorted(
+        (barcode.encode("utf-8"), product_id, (name or "").encode("utf-8"), unit_price or 0.0)
+        for barcode, product_id, name, unit_price in rows
+    )
+    count = len(entries)
+    width = max((len(e[0]) for e in entries), default=1)
+
+    barcodes = bytearray(count * width)
+    records = bytearray(count * RECORD.size)
+    names = bytearray()
+    for i, (code, product_id, name, unit_price) in enumerate(entries):
+        barcodes[i * width:i * width + len(code)] = code
+        RECORD.pack_into(records, i * RECORD.size,
+                         product_id, int(round(unit_price * 100)), len(names), len(name))
+        names += name
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, count, width, 0, generation, instance))
+        f.write(barcodes)
+        f.write(records)
+        f.write(names)
+        f.flush()
+        os.fsync(f.fileno())
+
+    # En Windows no se puede reemplazar un archivo mapeado: soltar el nuestro primero
+    _reader.close()
+    try:
+        os.replace(tmp_path, path)
+    except OSError as e:
+        # Otro proceso lo tiene mapeado (Windows). El snapshot viejo queda con una
+        # generación distinta, así que se ignora hasta la próxima sincronización.
+        print(f"No se pudo reemplazar el snapshot del catálogo: {e}")
+        os.remove(tmp_path)
+        return 0
+
+    print(f"DEBUG: write_snapshot() -> {count} productos en {path} (generación {generation}).")
+    return count
+
+
+def is_current(path: str = CATALOG_SNAPSHOT_FILE) -> bool:
+    """True si el snapshot en disco corresponde a esta base y a su generación actual."""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+    except OSError:
+        return False
+    if len(header) < HEADER.size:
+        return False
+    magic, version, _, _, _, generation, instance = HEADER.unpack(header)
+    return (magic == MAGIC and version == FORMAT_VERSION
+            and (instance, generation) == _read_version(get_connection()))
+
+
+############################################
+# Lectura
+############################################
+class _SnapshotReader:
+    """Mantiene el archivo mapeado y lo vuelve a mapear cuando cambia en disco."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self._mm = None
+        self._stat_key = None
+        self._last_stat = 0.0
+        self._valid = False
+        self._count = 0
+        self._width = 0
+        self._records_off = 0
+        self._names_off = 0
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+    def invalidate(self):
+        """Fuerza a revalidar el snapshot contra la base en la próxima búsqueda."""
+        with self._lock:
+            self._stat_key = None
+            self._last_stat = 0.0
+
+    def _close_locked(self):
+        if self._mm is not None:
+            self._mm.close()
+        if self._file is not None:
+            self._file.close()
+        self._mm = self._file = None
+        self._stat_key = None
+        self._valid = False
+
+    def _open_locked(self, stat_key):
+        self._close_locked()
+        self._stat_key = stat_key
+
+        f = open(self.path, "rb")
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # archivo vacío
+            f.close()
+            return
+        self._file, self._mm = f, mm
+
+        if len(mm) < HEADER.size:
+            return
+        magic, version, count, width, _, generation, instance = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            return
+        if (instance, generation) != _read_version(get_connection()):
+            print("DEBUG: snapshot del catálogo desactualizado, se usa SQLite.")
+            return
+
+        self._count = count
+        self._width = width
+        self._records_off = HEADER.size + count * width
+        self._names_off = self._records_off + count * RECORD.size
+        self._valid = True
+
+    def lookup(self, barcode: str):
+        key = barcode.encode("utf-8")
+        with self._lock:
+            now = time.monotonic()
+            if self._stat_key is None or now - self._last_stat >= STAT_INTERVAL_S:
+                self._last_stat = now
+                try:
+                    st = os.stat(self.path)
+                except OSError:
+                    self._close_locked()
+                    return UNAVAILABLE
+
+                stat_key = (st.st_mtime_ns, st.st_size, st.st_ino)
+                if stat_key != self._stat_key:
+                    self._open_locked(stat_key)
+            if not self._valid:
+                return UNAVAILABLE
+
+            width = self._width
+            if len(key) > width:
+                return None
+            key = key.ljust(width, b"\0")
+
+            # Búsqueda binaria directamente sobre el mapa
+            mm = self._mm
+            lo, hi = 0, self._count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                start = HEADER.size + mid * width
+                probe = mm[start:start + width]
+                if probe < key:
+                    lo = mid + 1
+                elif probe > key:
+                    hi = mid
+                else:
+                    product_id, cents, name_off, name_len = RECORD.unpack_from(
+                        mm, self._records_off + mid * RECORD.size)
+                    name_start = self._names_off + name_off
+                    return {
+                        "id": product_id,
+                        "barcode": barcode,
+                        "name": mm[name_start:name_start + name_len].decode("utf-8"),
+                        "unit_price": cents / 100
+                    }
+            return None
+
+
+_reader = _SnapshotReader(CATALOG_SNAPSHOT_FILE)
+
+
+def lookup(barcode: str):
+    """
+    Busca un barcode en el snapshot sin pasar por SQLite.
+    Retorna el dict del producto, None si no existe, o UNAVAILABLE si el
+    snapshot no está disponible o no corresponde a la base actual.
+    """
+    return _reader.lookup(barcode)
+
+
+def invalidate():
+    """Llamar tras modificar products para que el snapshot se revalide."""
+    _reader.invalidate()
@@ -1,16 +1,23 @@
 # src/cierre_caja.py
 
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QApplication
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QApplication,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+)
 from PyQt6.QtGui import QFont, QGuiApplication
 from PyQt6.QtCore import Qt
 from src.close_cash_register_worker import CloseCashRegisterWorker
 from src.loading_dialog import MaterialLoadingDialog
+from src.sales_ledger import get_session_summary, close_session
 
 class CierreCajaWindow(QWidget):
     def __init__(self):
         super().__init__()
+        self.close_worker = None  # Tarea de red en curso (ver network_engine.py)
         self.setWindowTitle("Cierre de Caja")
-        self.setFixedSize(400, 300)
+        self.setFixedSize(480, 560)
+        # Totales acumulados localmente durante la sesión (sin llamar a la API)
+        self.summary = get_session_summary()
         self.setup_ui()
         self.center_window()
 
@@ -24,6 +31,24 @@ class CierreCajaWindow(QWidget):
         titulo.setFont(QFont("Arial", 12, QFont.Weight.Bold))
         layout.addWidget(titulo)
 
+        # Monto esperado y detalle por producto según el libro local
+        self.expected_label = QLabel(self._expected_text())
+        self.expected_label.setWordWrap(True)
+        layout.addWidget(self.expected_label)
+
+        self.breakdown_table = QTableWidget()
+        self.breakdown_table.setColumnCount(3)
+        self.breakdown_table.setHorizontalHeaderLabels(["Producto", "Cantidad", "Total"])
+        self.breakdown_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.breakdown_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        products = self.summary["products"] if self.summary else []
+        self.breakdown_table.setRowCount(len(products))
+        for row, product in enumerate(products):
+            self.breakdown_table.setItem(row, 0, QTableWidgetItem(str(product["name"])))
+            self.breakdown_table.setItem(row, 1, QTableWidgetItem(str(product["quantity"])))
+            self.breakdown_table.setItem(row, 2, QTableWidgetItem(f"${product['total']:.2f}"))
+        layout.addWidget(self.breakdown_table)
+
         # Campo para ingresar el monto de cierre
         self.closing_amount_input = QLineEdit()
         self.closing_amount_input.setPlaceholderText("Monto de cierre")
@@ -66,6 +91,22 @@ class CierreCajaWindow(QWidget):
 
         self.setLayout(layout)
 
+    def _expected_text(self) -> str:
+        if not self.summary:
+            return "No hay ventas registradas localmente para esta caja."
+        text = (
+            f"Monto esperado: ${self.summary['expected_amount']:.2f}\n"
+            f"Apertura ${self.summary['opening_amount']:.2f} + "
+            f"{self.summary['sales_count']} ventas por ${self.summary['sales_total']:.2f}"
+        )
+        if self.summary["rejected_count"]:
+            # No cuentan en el monto esperado: el servidor no las registró
+            text += (
+                f"\n{self.summary['rejected_count']} ventas rechazadas por el servidor "
+                f"(${self.summary['rejected_total']:.2f}, no incluidas)"
+            )
+        return text
+
     def center_window(self):
         """ Centra la ventana en la pantalla. """
         screen_geometry = QGuiApplication.primaryScreen().geometry()
@@ -74,6 +115,9 @@ class CierreCajaWindow(QWidget):
         self.move(center_x, center_y)
 
     def confirm(self):
+        if self.close_worker is not None and self.close_worker.isRunning():
+            return  # Ya hay una petición en curso (doble clic)
+
         closing_amount_text = self.closing_amount_input.text().strip()
         try:
             closing_amount = float(closing_amount_text)
@@ -95,6 +139,7 @@ class CierreCajaWindow(QWidget):
         if isinstance(result, Exception):
             QMessageBox.critical(self, "Error al cerrar caja", str(result))
         else:
+            close_session(self.close_worker.closing_amount)
             QMessageBox.information(self, "Éxito", "Caja cerrada exitosamente.")
             # Cerrar la aplicación o todas las ventanas
             QApplication.quit()
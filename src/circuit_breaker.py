@@ -0,0 +1,130 @@
+# circuit_breaker.py
+
+import threading
+import time
+
+import requests
+from src.constants import NET_BREAKER_FAILURES, NET_BREAKER_RESET_S
+
+############################################
+# Circuit breaker de la API
+############################################
+# Cuenta los errores de transporte (sin conexión, timeouts) de las peticiones
+# a API_BASE_URL. Tras NET_BREAKER_FAILURES seguidos se "abre": las
+# peticiones fallan al instante con OfflineError en vez de esperar timeouts.
+# Mientras está abierto, ConnectivityMonitor (connectivity.py) sondea la API
+# en segundo plano; si nadie sondea, pasados NET_BREAKER_RESET_S se deja
+# pasar UNA petición de prueba (half-open) que decide si se cierra. Cualquier
+# resultado de la prueba que no sea una respuesta HTTP lo vuelve a abrir; si
+# la prueba nunca informa nada, tras otros NET_BREAKER_RESET_S sale otra.
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class OfflineError(requests.ConnectionError):
+    """La API se considera inalcanzable; la petición ni siquiera se intentó."""
+
+
+class CircuitBreaker:
+
+    def __init__(self, failure_threshold: int = NET_BREAKER_FAILURES,
+                 reset_timeout: float = NET_BREAKER_RESET_S):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._listeners = []
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def is_online(self) -> bool:
+        """False mientras el circuito está abierto (o probando)."""
+        return self._state == CLOSED
+
+    def add_listener(self, callback):
+        """'callback(online: bool)' se llama (desde cualquier hilo) al cambiar de estado."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    @property
+    def can_attempt(self) -> bool:
+        """
+        True si una petición saldría ahora (como allow(), pero sin consumir la
+        prueba half-open): los que sólo deciden si vale la pena intentar.
+        """
+        with self._lock:
+            return self._state == CLOSED or time.monotonic() - self._opened_at >= self.reset_timeout
+
+    def allow(self) -> bool:
+        """True si la petición puede salir; pasa a half-open cuando vence la espera."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state != CLOSED and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._opened_at = time.monotonic()  # Plazo de la prueba en curso
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            changed = self._state != CLOSED
+            self._state = CLOSED
+            self._failures = 0
+        if changed:
+            self._notify(True)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            opening = self._state == HALF_OPEN or (
+                self._state == CLOSED and self._failures >= self.failure_threshold
+            )
+            was_closed = self._state == CLOSED
+            if opening or self._state == OPEN:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+        if opening and was_closed:
+            self._notify(False)
+
+    def abort_trial(self):
+        """La petición terminó sin respuesta HTTP por otro motivo: si era la prueba, cuenta como fallo."""
+        with self._lock:
+            if self._state != HALF_OPEN:
+                return
+        self.record_failure()
+
+    def _notify(self, online: bool):
+        print(f"DEBUG: API {'en línea' if online else 'sin conexión'}.")
+        for callback in list(self._listeners):
+            try:
+                callback(online)
+            except Exception as e:
+                print(f"DEBUG: listener de conectividad falló: {e}")
+
+
+# Estado compartido de la conexión con la API
+BREAKER = CircuitBreaker()
+
+
+def is_online() -> bool:
+    return BREAKER.is_online
+
+
+def can_attempt() -> bool:
+    """
+    False sólo mientras el breaker bloquea las peticiones. Para quien decide
+    si intentar (envío de ventas, sincronización): al vencer la espera su
+    propia petición es la prueba half-open, haya o no ConnectivityMonitor.
+    """
+    return BREAKER.can_attempt
@@ -1,16 +1,14 @@
 # src/close_cash_register_worker.py
 
-from PyQt6.QtCore import QThread, pyqtSignal
-import requests
-from src.constants import API_BASE_URL, ACCESS_TOKEN_FILE, HOST_FILE
-from src.utils import read_file
+from src.network_engine import NetworkTask, Priority
+from src.utils import request_with_refresh
 
-class CloseCashRegisterWorker(QThread):
+class CloseCashRegisterWorker(NetworkTask):
     """
-    Worker que realiza la petición POST para cerrar la caja mediante el endpoint /cash-register/close.
+    Tarea de red que realiza la petición POST para cerrar la caja mediante el endpoint /cash-register/close.
     Emite la señal 'finished' con la respuesta (un diccionario) en caso de éxito, o con una excepción en caso de error.
     """
-    finished = pyqtSignal(object)
+    priority = Priority.INTERACTIVE
     
     def __init__(self, closing_amount):
         """
@@ -20,29 +18,8 @@ class CloseCashRegisterWorker(QThread):
         self.closing_amount = closing_amount
 
     def run(self):
-        try:
-            # Leer el host configurado
-            host = read_file(HOST_FILE)
-            if not host:
-                raise Exception("El Host no está configurado.")
-            
-            # Leer el token de acceso
-            token = read_file(ACCESS_TOKEN_FILE)
-            if not token:
-                raise Exception("El token de acceso no está disponible.")
-            
-            url = f"{API_BASE_URL}/cash-register/close"
-            data = {"closing_amount": self.closing_amount}
-            headers = {
-                "Accept": "application/json",
-                "Host": host,
-                "Authorization": f"Bearer {token}"
-            }
-            
-            response = requests.post(url, headers=headers, data=data)
-            if response.status_code in (200, 201):
-                self.finished.emit(response.json())
-            else:
-                raise Exception(f"Error al cerrar caja. Código: {response.status_code} - {response.text}")
-        except Exception as e:
-            self.finished.emit(e)
+        data = {"closing_amount": self.closing_amount}
+        response = request_with_refresh("POST", "/cash-register/close", data=data)
+        if response.status_code in (200, 201):
+            return response.json()
+        raise Exception(f"Error al cerrar caja. Código: {response.status_code} - {response.text}")
@@ -0,0 +1,63 @@
+# connectivity.py
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from src.circuit_breaker import BREAKER
+from src.constants import CONNECTIVITY_PROBE_INTERVAL_S
+from src.http_client import probe
+from src.network_engine import NetworkTask, Priority
+from src.utils import TOKENS
+
+
+class ProbeTask(NetworkTask):
+    """Sondeo de la API; pasa antes que la sincronización para reconectar cuanto antes."""
+    priority = Priority.SALES
+
+    def run(self):
+        return probe(TOKENS.host)
+
+
+class ConnectivityMonitor(QObject):
+    """
+    Publica el estado en línea / sin conexión del circuit breaker en el hilo de la GUI.
+    Mientras la API no responde, la sondea cada CONNECTIVITY_PROBE_INTERVAL_S
+    con una petición barata; al volver emite 'online_changed(True)'.
+    """
+    online_changed = pyqtSignal(bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.task = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(CONNECTIVITY_PROBE_INTERVAL_S * 1000)
+        self.timer.timeout.connect(self.probe_now)
+
+        # El breaker avisa desde cualquier hilo; la señal se entrega en el de la GUI
+        self.online_changed.connect(self._on_online_changed)
+        self._listener = self.online_changed.emit
+        BREAKER.add_listener(self._listener)
+        if not BREAKER.is_online:
+            self.timer.start()
+
+    @property
+    def is_online(self) -> bool:
+        return BREAKER.is_online
+
+    def probe_now(self):
+        if self.task is not None:
+            return
+        self.task = ProbeTask()
+        self.task.finished.connect(self._on_probe_finished)
+        self.task.start()
+
+    def stop(self):
+        BREAKER.remove_listener(self._listener)
+        self.timer.stop()
+
+    def _on_probe_finished(self, _):
+        self.task = None
+
+    def _on_online_changed(self, online: bool):
+        if online:
+            self.timer.stop()
+        elif not self.timer.isActive():
+            self.timer.start()
@@ -5,6 +5,72 @@ API_BASE_URL = "http://localhost:8000/api"
 ACCESS_TOKEN_FILE = "access_token.txt"
 REFRESH_TOKEN_FILE = "refresh_token.txt"
 HOST_FILE = "host_config.txt"
+TOKEN_REFRESH_MARGIN_S = 60          # Refrescar el JWT si vence antes de esto (ver token_store.py)
 
 # SQLite DB local
 DB_FILE = "products.db"
+
+# Ajustes de la conexión SQLite (ver db_connection.py)
+DB_BUSY_TIMEOUT_MS = 5000            # Espera máxima por un lock antes de fallar
+DB_CACHED_STATEMENTS = 256           # Sentencias preparadas en caché por conexión
+DB_MMAP_SIZE = 256 * 1024 * 1024     # Lectura vía memory-mapped I/O (256 MB)
+DB_CACHE_SIZE_KB = 16 * 1024         # Caché de páginas por conexión (16 MB)
+DB_MAINTENANCE_INTERVAL_S = 6 * 60 * 60  # PRAGMA optimize cada 6 horas
+DB_WRITE_CHUNK_SIZE = 2000           # Filas por transacción en save_products
+
+# Snapshot binario del catálogo (ver catalog_snapshot.py)
+CATALOG_SNAPSHOT_ENABLED = True
+CATALOG_SNAPSHOT_FILE = "catalog.bin"
+
+# Cola local de ventas (ver sales_outbox.py)
+OUTBOX_POLL_INTERVAL_S = 15          # Revisión periódica aunque no lleguen ventas nuevas
+OUTBOX_BACKOFF_BASE_S = 2            # Reintentos: 2, 4, 8... segundos
+OUTBOX_BACKOFF_MAX_S = 5 * 60
+
+# Sincronización de productos (ver sync.py)
+SYNC_PAGE_SIZE = 1000                # Productos por página pedidos a /products
+SYNC_MAX_CONCURRENCY = 4             # Páginas descargándose a la vez
+SYNC_INTERVAL_MS = 60 * 1000         # Intervalo base; SyncScheduler lo adapta
+SYNC_MAX_DELETE_FRACTION = 0.5       # Una sincronización completa no puede borrar más que esto del catálogo
+
+# Carga inicial desde un snapshot SQLite (ver catalog_bootstrap.py)
+SNAPSHOT_MANIFEST_ENDPOINT = "/products/snapshot"
+SNAPSHOT_DOWNLOAD_FILE = "catalog_snapshot.download.db"
+SNAPSHOT_CHUNK_SIZE = 256 * 1024
+
+# Motor de red (ver network_engine.py)
+NETWORK_MAX_CONCURRENCY = 4          # Tareas de red ejecutándose a la vez
+NETWORK_SHUTDOWN_TIMEOUT_S = 3       # Espera máxima por las tareas en curso al cerrar
+
+# HTTP (ver http_client.py y utils.request_with_refresh)
+HTTP_POOL_SIZE = 10                  # Conexiones keep-alive reutilizables por host
+HTTP_MAX_RETRIES = 3                 # Sólo métodos idempotentes (GET, PUT, DELETE...)
+HTTP_RETRY_BACKOFF_S = 0.5           # Espera entre reintentos: 0.5, 1, 2... segundos
+HTTP_DEFAULT_TIMEOUT = (3.05, 15)    # (conexión, lectura) en segundos
+HTTP_ENDPOINT_TIMEOUTS = {           # Por prefijo de endpoint; gana el más largo
+    "/auth": (3.05, 10),
+    "/cash-register": (3.05, 10),
+    "/sales": (3.05, 20),
+    "/products": (3.05, 30),
+    "/products/snapshot/": (3.05, 120),
+}
+HTTP_SLOW_REQUEST_S = 2.0            # Peticiones más lentas se anotan en el log
+HTTP_GZIP_REQUESTS = False           # Comprimir cuerpos JSON grandes (sólo si la API acepta Content-Encoding: gzip)
+HTTP_GZIP_MIN_BYTES = 1024           # Cuerpos más chicos se envían sin comprimir
+
+# Detección de "sin conexión" (ver circuit_breaker.py y connectivity.py)
+NET_BREAKER_FAILURES = 3             # Errores de red seguidos para pasar a "sin conexión"
+NET_BREAKER_RESET_S = 30             # Sin sondeo, reintentar una petición tras este tiempo
+CONNECTIVITY_PROBE_ENDPOINT = "/health"
+CONNECTIVITY_PROBE_INTERVAL_S = 5    # Sondeo mientras la API no responde
+CONNECTIVITY_PROBE_TIMEOUT = (1.5, 2)
+
+# Lector de códigos de barras (ver scan_input.py)
+SCAN_MAX_KEY_INTERVAL_MS = 35        # Teclas más seguidas que esto vienen del lector, no de una persona
+SCAN_MIN_LENGTH = 4                  # Largo mínimo de un código escaneado
+SCAN_BATCH_WINDOW_MS = 15            # Espera para juntar códigos y resolverlos en una consulta
+TOAST_DURATION_MS = 2500             # Aviso no modal de "código no encontrado"
+
+# Perfil de arranque (ver startup_timeline.py)
+STARTUP_LOG_FILE = "startup_timeline.jsonl"  # Una línea JSON por arranque
+STARTUP_SLOW_MS = 1000               # Arranques más lentos se anotan en el log
@@ -0,0 +1,116 @@
+# db_connection.py
+
+import sqlite3
+import threading
+import time
+
+from src.constants import (
+    DB_FILE,
+    DB_BUSY_TIMEOUT_MS,
+    DB_CACHED_STATEMENTS,
+    DB_MMAP_SIZE,
+    DB_CACHE_SIZE_KB,
+    DB_MAINTENANCE_INTERVAL_S
+)
+
+############################################
+# Conexiones por hilo
+############################################
+# Cada hilo (UI, SyncWorker, etc.) mantiene UNA conexión abierta y afinada.
+# sqlite3 no permite compartir una conexión entre hilos sin serializarla,
+# así que en vez de un lock global se usa una conexión por hilo y se deja
+# que el modo WAL permita lecturas concurrentes mientras otro hilo escribe.
+_local = threading.local()
+_registry_lock = threading.Lock()
+_connections = {}  # ident del hilo -> sqlite3.Connection
+
+_maintenance_lock = threading.Lock()
+_last_maintenance = 0.0
+
+
+def _configure(conn: sqlite3.Connection):
+    """Aplica los PRAGMA de rendimiento a una conexión recién abierta."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA mmap_size={int(DB_MMAP_SIZE)}")
+    conn.execute(f"PRAGMA cache_size=-{int(DB_CACHE_SIZE_KB)}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute(f"PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT_MS)}")
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Retorna la conexión del hilo actual, creándola la primera vez.
+    La conexión queda abierta para reutilizar el schema ya parseado y las
+    sentencias preparadas entre un escaneo y otro.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        return conn
+
+    conn = sqlite3.connect(
+        DB_FILE,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        cached_statements=DB_CACHED_STATEMENTS,
+        # Sólo el hilo dueño la usa; se desactiva el chequeo para poder
+        # cerrarla desde close_all_connections() al salir de la app.
+        check_same_thread=False
+    )
+    _configure(conn)
+
+    _local.conn = conn
+    with _registry_lock:
+        _connections[threading.get_ident()] = conn
+    return conn
+
+
+def close_connection():
+    """Cierra la conexión del hilo actual (llamar al terminar un QThread)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        return
+    _local.conn = None
+    with _registry_lock:
+        _connections.pop(threading.get_ident(), None)
+    conn.close()
+
+
+def close_all_connections():
+    """Cierra todas las conexiones abiertas. Pensado para el cierre de la app."""
+    with _registry_lock:
+        conns = list(_connections.values())
+        _connections.clear()
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    _local.conn = None
+
+
+############################################
+# Mantenimiento periódico
+############################################
+def run_maintenance(force: bool = False) -> bool:
+    """
+    Ejecuta PRAGMA optimize (y ANALYZE completo si force=True) como máximo
+    una vez cada DB_MAINTENANCE_INTERVAL_S segundos.
+    Retorna True si el mantenimiento se ejecutó.
+    """
+    global _last_maintenance
+
+    now = time.monotonic()
+    with _maintenance_lock:
+        if not force and _last_maintenance and now - _last_maintenance < DB_MAINTENANCE_INTERVAL_S:
+            return False
+        _last_maintenance = now
+
+    conn = get_connection()
+    if force:
+        conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+    # Devuelve el WAL al archivo principal sin bloquear a los lectores
+    conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+    conn.commit()
+    print("DEBUG: run_maintenance() -> PRAGMA optimize ejecutado.")
+    return True
@@ -2,8 +2,6 @@ from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton
 from PyQt6.QtGui import QFont, QGuiApplication
 from PyQt6.QtCore import Qt
 
-from src.utils import write_file
-from src.constants import HOST_FILE
 from src.login import LoginWindow
 
 
@@ -87,8 +85,9 @@ class HostConfigWindow(QWidget):
             QMessageBox.critical(self, "Error", "El campo Host no puede estar vacío.")
             return
 
+        from src.utils import TOKENS  # Pila de red: sólo al guardar
         try:
-            write_file(HOST_FILE, host)
+            TOKENS.set_host(host)
             QMessageBox.information(self, "Éxito", "Host configurado correctamente.")
             self.open_login()
         except IOError as e:
@@ -0,0 +1,195 @@
+# http_client.py
+
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.constants import (
+    API_BASE_URL,
+    HTTP_POOL_SIZE,
+    HTTP_MAX_RETRIES,
+    HTTP_RETRY_BACKOFF_S,
+    HTTP_DEFAULT_TIMEOUT,
+    HTTP_ENDPOINT_TIMEOUTS,
+    HTTP_SLOW_REQUEST_S,
+    CONNECTIVITY_PROBE_ENDPOINT,
+    CONNECTIVITY_PROBE_TIMEOUT
+)
+from src.circuit_breaker import BREAKER, OfflineError
+
+############################################
+# Cliente HTTP único de la aplicación
+############################################
+# Todas las peticiones (workers, sincronización, outbox) pasan por request():
+# - Una sola requests.Session con un pool de HTTP_POOL_SIZE conexiones
+#   keep-alive; el pool de urllib3 es thread-safe, así que las tareas del motor
+#   de red y los hilos de descarga comparten conexiones en vez de abrir una por petición.
+# - Timeouts (conexión, lectura) por endpoint: un servidor colgado ya no
+#   bloquea un hilo para siempre.
+# - Reintentos con backoff sólo para métodos idempotentes (GET, HEAD, PUT,
+#   DELETE, OPTIONS) ante errores de conexión y 502/504. Un POST nunca se
+#   reenvía aquí: la outbox de ventas tiene sus propios reintentos.
+# - Un 503 / 429 (API sobrecargada) NO se reintenta ni se duerme su
+#   Retry-After dentro del hilo: vuelve al llamador, y SyncScheduler (vía
+#   SyncError.retry_after) decide cuándo volver a intentar.
+# - Latencia de cada petición agrupada por endpoint (ver latency_stats()).
+# - Circuit breaker (circuit_breaker.py): con la API caída las peticiones
+#   fallan al instante con OfflineError en vez de esperar los timeouts.
+
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "PUT", "DELETE", "OPTIONS"))
+RETRY_STATUS_CODES = (502, 504)
+
+# Muestras recientes por endpoint para calcular percentiles
+LATENCY_SAMPLES = 200
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=HTTP_MAX_RETRIES,
+        status=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_RETRY_BACKOFF_S,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=IDEMPOTENT_METHODS,
+        respect_retry_after_header=False,  # Si no, urllib3 reintenta 503/429 durmiendo sin tope
+        raise_on_status=False  # El llamador recibe la última respuesta y decide
+    )
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=HTTP_POOL_SIZE,
+                          max_retries=retry, pool_block=False)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+SESSION = _build_session()
+
+# Sesión sin reintentos para el sondeo de conectividad: debe responder rápido
+_PROBE_SESSION = requests.Session()
+
+
+def timeout_for(endpoint: str) -> tuple[float, float]:
+    """(connect, read) para 'endpoint': el prefijo más largo de HTTP_ENDPOINT_TIMEOUTS que calce."""
+    best = None
+    for prefix in HTTP_ENDPOINT_TIMEOUTS:
+        if endpoint.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return HTTP_ENDPOINT_TIMEOUTS[best] if best else HTTP_DEFAULT_TIMEOUT
+
+
+############################################
+# Latencias
+############################################
+class _LatencyStats:
+    """Latencias recientes por endpoint ('GET /products'), thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._counts = {}
+
+    def record(self, key: str, seconds: float, ok: bool):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=LATENCY_SAMPLES)).append(seconds)
+            count, errors = self._counts.get(key, (0, 0))
+            self._counts[key] = (count + 1, errors + (0 if ok else 1))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = {key: sorted(values) for key, values in self._samples.items()}
+            counts = dict(self._counts)
+        stats = {}
+        for key, values in samples.items():
+            count, errors = counts[key]
+            stats[key] = {
+                "count": count,
+                "errors": errors,
+                "p50_ms": round(values[len(values) // 2] * 1000, 1),
+                "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 1),
+                "max_ms": round(values[-1] * 1000, 1)
+            }
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+
+_LATENCY = _LatencyStats()
+
+
+def latency_stats() -> dict:
+    """{'GET /products': {'count', 'errors', 'p50_ms', 'p95_ms', 'max_ms'}, ...}"""
+    return _LATENCY.snapshot()
+
+
+def reset_latency_stats():
+    _LATENCY.reset()
+
+
+############################################
+# Petición
+############################################
+def request(method: str, endpoint: str, timeout=None, **kwargs) -> requests.Response:
+    """
+    Envía una petición por la sesión compartida. 'endpoint' es relativo a
+    API_BASE_URL (o una URL absoluta). Si no se indica 'timeout' se usa el del endpoint.
+    La latencia queda en response.latency (segundos, incluye reintentos).
+    Lanza requests.RequestException si no hubo respuesta, u OfflineError (sin
+    esperar) si el circuit breaker considera que la API está caída.
+    """
+    method = method.upper()
+    absolute = endpoint.startswith(("http://", "https://"))
+    url = endpoint if absolute else f"{API_BASE_URL}{endpoint}"
+    path = endpoint.split("?", 1)[0]
+    key = f"{method} {path}"
+
+    # Sólo las peticiones a la API pasan por el breaker (no las URLs absolutas de un CDN)
+    if not absolute and not BREAKER.allow():
+        raise OfflineError("Sin conexión con el servidor.")
+
+    start = time.perf_counter()
+    try:
+        response = SESSION.request(method, url, timeout=timeout or timeout_for(path), **kwargs)
+    except BaseException as e:
+        _LATENCY.record(key, time.perf_counter() - start, ok=False)
+        if not absolute:
+            if isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                BREAKER.record_failure()
+            else:
+                BREAKER.abort_trial()  # p. ej. ChunkedEncodingError en la petición de prueba
+        raise
+
+    if not absolute:
+        BREAKER.record_success()  # Cualquier respuesta HTTP: el servidor está alcanzable
+    elapsed = time.perf_counter() - start
+    response.latency = elapsed
+    _LATENCY.record(key, elapsed, ok=response.status_code < 500)
+    if elapsed >= HTTP_SLOW_REQUEST_S:
+        print(f"DEBUG: {key} tardó {elapsed * 1000:.0f} ms (código {response.status_code}).")
+    return response
+
+
+def probe(host: str = None) -> bool:
+    """
+    Petición barata a CONNECTIVITY_PROBE_ENDPOINT, sin reintentos ni breaker.
+    'host' es la cabecera Host del tenant (la misma que llevan las peticiones
+    reales, ver utils.request_with_refresh) para sondear ese virtual host.
+    Cualquier respuesta HTTP (incluso 404) cuenta como "en línea".
+    Actualiza el circuit breaker y retorna si la API respondió.
+    """
+    headers = {"Host": host} if host else {}
+    try:
+        _PROBE_SESSION.head(f"{API_BASE_URL}{CONNECTIVITY_PROBE_ENDPOINT}", headers=headers,
+                            timeout=CONNECTIVITY_PROBE_TIMEOUT, allow_redirects=False)
+    except requests.RequestException:
+        BREAKER.record_failure()
+        return False
+    BREAKER.record_success()
+    return True
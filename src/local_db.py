@@ -1,33 +1,51 @@
 # local_db.py
 
-import sqlite3
-import os
-from src.constants import DB_FILE
+import hashlib
+import json
+import re
+import threading
+from src import catalog_snapshot
+from src.constants import CATALOG_SNAPSHOT_ENABLED, DB_WRITE_CHUNK_SIZE, SYNC_MAX_DELETE_FRACTION
+from src.db_connection import get_connection
+from src.migrations import apply_migrations
+
+_init_lock = threading.Lock()
+_db_ready = False
+_fts_enabled = None
 
 def init_db():
     """
-    Crea la tabla 'products' si no existe, con columna 'id' como PRIMARY KEY.
-    Si ya existía una tabla sin 'id', deberás borrar o renombrar el DB_FILE
-    para que se cree desde cero con la nueva estructura.
+    Deja el schema local en la última versión aplicando las migraciones
+    pendientes (ver migrations.py). Sólo trabaja la primera vez por proceso;
+    las llamadas siguientes no tocan la base.
     """
-    print("DEBUG: init_db() -> Creando tabla products con id INTEGER PRIMARY KEY.")
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS products (
-        id INTEGER PRIMARY KEY,
-        barcode TEXT,
-        name TEXT,
-        unit_price REAL
-    )
-    """)
-    conn.commit()
-    conn.close()
+    global _db_ready
+    if _db_ready:
+        return
+
+    with _init_lock:
+        if _db_ready:
+            return
+        version = apply_migrations(get_connection())
+        print(f"DEBUG: init_db() -> schema local en versión {version}.")
+        _db_ready = True
 
-def save_products(product_list):
+def _content_hash(barcode, name, price) -> int:
+    """Hash estable (64 bits con signo, cabe en INTEGER) del contenido de un producto."""
+    raw = f"{barcode}\x1f{name}\x1f{price!r}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "big", signed=True)
+
+def _normalize_product(prod: dict):
+    """Convierte el dict de la API en la tupla (id, barcode, name, unit_price, content_hash)."""
+    barcode = prod.get("barcode") or None  # '' => NULL (índice único)
+    name    = prod.get("name", "")
+    price   = float(prod.get("unit_price", 0.0))
+    return (prod.get("id"), barcode, name, price, _content_hash(barcode, name, price))
+
+def save_products(product_list) -> dict:
     """
-    Inserta o actualiza la lista de productos dada.
+    Inserta o actualiza la lista de productos dada, escribiendo sólo las filas
+    cuyo contenido cambió (se compara content_hash).
     Cada dict en 'product_list' debería ser algo como:
         {
           "id": 123,
@@ -35,36 +53,282 @@ def save_products(product_list):
           "name": "Omega 3",
           "unit_price": 500.0
         }
+    Retorna los contadores {'inserted', 'updated', 'unchanged'}; las bajas
+    las cuentan delete_products (tombstones) y commit_staging (completa).
     """
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+    conn = get_connection()
 
+    rows = {}
+    barcode_owner = {}
     for prod in product_list:
-        product_id = prod.get("id")
-        barcode    = prod.get("barcode", "")
-        name       = prod.get("name", "")
-        price      = float(prod.get("unit_price", 0.0))
+        if prod.get("id") is None:
+            print(f"Producto sin id ignorado: {prod}")
+            continue
+        row = _normalize_product(prod)
+        rows[row[0]] = row  # Si un id viene repetido, gana el último
+        if row[1] is not None:
+            previous = barcode_owner.get(row[1])
+            if previous is not None and previous != row[0] and rows[previous][1] == row[1]:
+                # Barcode repetido en la misma lista: gana el último (índice único)
+                old = rows[previous]
+                rows[previous] = (old[0], None, old[2], old[3], _content_hash(None, old[2], old[3]))
+            barcode_owner[row[1]] = row[0]
+
+    # Hashes actuales de esos ids en una sola consulta
+    ids_json = json.dumps(list(rows))
+    existing = dict(conn.execute(
+        "SELECT id, content_hash FROM products WHERE id IN (SELECT value FROM json_each(?))",
+        (ids_json,)
+    ))
+
+    inserted = updated = unchanged = 0
+    changed = []
+    for product_id, row in rows.items():
+        if product_id not in existing:
+            inserted += 1
+        elif existing[product_id] != row[4]:
+            updated += 1
+        else:
+            unchanged += 1
+            continue
+        changed.append(row)
+
+    has_fts = _has_fts(conn)
+
+    # Transacciones cortas para no retener el lock de escritura todo el rato
+    for start in range(0, len(changed), DB_WRITE_CHUNK_SIZE):
+        chunk = changed[start:start + DB_WRITE_CHUNK_SIZE]
+        with conn:
+            # Un barcode que pasó a otro id: se le quita al producto que lo
+            # tenía (queda buscable por nombre y se reescribe en la próxima
+            # sincronización porque su content_hash queda en NULL)
+            pairs_json = json.dumps([[row[0], row[1]] for row in chunk if row[1] is not None])
+            holders = [product_id for (product_id,) in conn.execute("""
+                SELECT p.id FROM products p
+                JOIN json_each(?) j ON p.barcode = json_extract(j.value, '$[1]')
+                WHERE p.id != json_extract(j.value, '$[0]')
+            """, (pairs_json,))]
+            if holders:
+                conn.execute(
+                    "UPDATE products SET barcode = NULL, content_hash = NULL "
+                    "WHERE id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(holders),)
+                )
+                updated += sum(1 for product_id in holders if product_id not in rows)
+
+            # Upsert por id: INSERT OR REPLACE borraría en silencio la fila de
+            # otro producto que choque en el índice único de barcode
+            conn.executemany("""
+                INSERT INTO products (id, barcode, name, unit_price, content_hash)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    barcode = excluded.barcode,
+                    name = excluded.name,
+                    unit_price = excluded.unit_price,
+                    content_hash = excluded.content_hash
+            """, chunk)
+            if has_fts:
+                conn.executemany("DELETE FROM products_fts WHERE rowid = ?",
+                                 [(row[0],) for row in chunk])
+                conn.executemany("INSERT INTO products_fts (rowid, name) VALUES (?, ?)",
+                                 [(row[0], row[2]) for row in chunk])
+
+    if changed:
+        with conn:
+            _bump_catalog_generation(conn)
+        catalog_snapshot.invalidate()
+
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": unchanged
+    }
 
-        # Insert or replace => si existe 'id' igual, se actualiza
-        cursor.execute("""
-            INSERT OR REPLACE INTO products (id, barcode, name, unit_price)
-            VALUES (?, ?, ?, ?)
-        """, (product_id, barcode, name, price))
+def delete_products(product_ids) -> int:
+    """Elimina los productos indicados (tombstones de la API). Retorna cuántos borró."""
+    conn = get_connection()
+    ids_json = json.dumps(list(product_ids))
+    with conn:
+        deleted = conn.execute(
+            "DELETE FROM products WHERE id IN (SELECT value FROM json_each(?))", (ids_json,)
+        ).rowcount
+        if deleted:
+            if _has_fts(conn):
+                conn.execute(
+                    "DELETE FROM products_fts WHERE rowid IN (SELECT value FROM json_each(?))",
+                    (ids_json,)
+                )
+            _bump_catalog_generation(conn)
+    if deleted:
+        catalog_snapshot.invalidate()
+    return deleted
 
-    conn.commit()
-    conn.close()
+############################################
+# Recarga completa en tabla de staging
+############################################
+# Una sincronización completa llena 'products_staging' (invisible para las
+# búsquedas) y al final la intercambia con 'products' mediante RENAME dentro
+# de una transacción corta: los lectores ven el catálogo viejo o el nuevo,
+# nunca una mezcla, y el lock de escritura se toma sólo para el intercambio.
+STAGING_TABLE = "products_staging"
+STAGING_FTS_TABLE = "products_fts_staging"
+_BARCODE_INDEX_NAMES = ("idx_products_barcode", "idx_products_barcode_b")
+
+def _create_like(conn, source: str, target: str):
+    """Crea 'target' con el mismo DDL que 'source' (sigue a las migraciones)."""
+    sql = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (source,)
+    ).fetchone()[0]
+    ddl = re.sub(r'^(CREATE (?:VIRTUAL )?TABLE)\s+"?%s"?' % source, r'\1 %s' % target, sql)
+    conn.execute(ddl)
+
+def begin_staging():
+    """Prepara tablas de staging vacías para una recarga completa del catálogo."""
+    conn = get_connection()
+    discard_staging()
+    with conn:
+        _create_like(conn, "products", STAGING_TABLE)
+
+def stage_products(product_list) -> int:
+    """Agrega productos al staging (se puede llamar una vez por página). Retorna cuántos."""
+    rows = [_normalize_product(prod) for prod in product_list if prod.get("id") is not None]
+    conn = get_connection()
+    with conn:
+        conn.executemany(f"""
+            INSERT OR REPLACE INTO {STAGING_TABLE} (id, barcode, name, unit_price, content_hash)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+    return len(rows)
+
+def stage_products_from_db(path: str) -> int:
+    """
+    Copia al staging la tabla products de otra base SQLite (snapshot descargado)
+    usando ATTACH, sin pasar fila por fila por Python. Retorna cuántos copió.
+    """
+    conn = get_connection()
+    # content_hash se calcula igual que en save_products
+    conn.create_function("content_hash", 3, _content_hash, deterministic=True)
+    conn.execute("ATTACH DATABASE ? AS snapshot", (path,))
+    try:
+        with conn:
+            return conn.execute(f"""
+                INSERT OR REPLACE INTO {STAGING_TABLE} (id, barcode, name, unit_price, content_hash)
+                SELECT id, barcode, name, price, content_hash(barcode, name, price)
+                FROM (
+                    SELECT id, NULLIF(barcode, '') AS barcode, COALESCE(name, '') AS name,
+                           CAST(COALESCE(unit_price, 0) AS REAL) AS price
+                    FROM snapshot.products
+                    WHERE id IS NOT NULL
+                )
+            """).rowcount
+    finally:
+        conn.execute("DETACH DATABASE snapshot")
+
+def discard_staging():
+    """Elimina las tablas de staging (p. ej. si la descarga falló a medias)."""
+    conn = get_connection()
+    with conn:
+        conn.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+        conn.execute(f"DROP TABLE IF EXISTS {STAGING_FTS_TABLE}")
+
+class StagingRejected(Exception):
+    """El staging borraría demasiado del catálogo actual; no se intercambió."""
+
+
+def commit_staging() -> dict:
+    """
+    Indexa el staging, lo compara con el catálogo actual y, si hay diferencias,
+    lo intercambia con 'products' de forma atómica.
+    Si el staging está vacío o borraría más de SYNC_MAX_DELETE_FRACTION de los
+    productos actuales (p. ej. la API respondió una página vacía), lo descarta
+    y lanza StagingRejected: mejor un catálogo viejo que uno vacío.
+    Retorna los contadores {'inserted', 'updated', 'deleted', 'unchanged'}.
+    """
+    conn = get_connection()
+    has_fts = _has_fts(conn)
+
+    # 1) Preparar el staging fuera del intercambio (los lectores no lo ven)
+    with conn:
+        # Mismo criterio que la migración 2 ante barcodes duplicados
+        conn.execute(f"""
+            DELETE FROM {STAGING_TABLE}
+            WHERE barcode IS NOT NULL
+              AND id NOT IN (SELECT MAX(id) FROM {STAGING_TABLE}
+                             WHERE barcode IS NOT NULL GROUP BY barcode)
+        """)
+        used = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'products'")}
+        index_name = next(name for name in _BARCODE_INDEX_NAMES if name not in used)
+        conn.execute(f"CREATE UNIQUE INDEX {index_name} ON {STAGING_TABLE}(barcode)")
+
+    # 2) Diferencias contra el catálogo actual
+    inserted, updated, deleted, total = conn.execute(f"""
+        SELECT
+            (SELECT COUNT(*) FROM {STAGING_TABLE} s
+              WHERE NOT EXISTS (SELECT 1 FROM products p WHERE p.id = s.id)),
+            (SELECT COUNT(*) FROM {STAGING_TABLE} s JOIN products p ON p.id = s.id
+              WHERE p.content_hash IS NOT s.content_hash),
+            (SELECT COUNT(*) FROM products p
+              WHERE NOT EXISTS (SELECT 1 FROM {STAGING_TABLE} s WHERE s.id = p.id)),
+            (SELECT COUNT(*) FROM {STAGING_TABLE})
+    """).fetchone()
+    stats = {
+        "inserted": inserted,
+        "updated": updated,
+        "deleted": deleted,
+        "unchanged": total - inserted - updated
+    }
+    if not (inserted or updated or deleted):
+        discard_staging()  # Nada cambió: no tocar el catálogo vivo
+        return stats
+
+    current = total - inserted + deleted
+    if current and (total == 0 or deleted > current * SYNC_MAX_DELETE_FRACTION):
+        discard_staging()
+        message = (f"La sincronización completa borraría {deleted} de {current} productos "
+                   f"(llegaron {total}); se conserva el catálogo actual.")
+        print(f"DEBUG: commit_staging() -> {message}")
+        raise StagingRejected(message)
+
+    if has_fts:
+        with conn:
+            _create_like(conn, "products_fts", STAGING_FTS_TABLE)
+            conn.execute(f"INSERT INTO {STAGING_FTS_TABLE} (rowid, name) SELECT id, name FROM {STAGING_TABLE}")
+
+    # 3) Intercambio atómico: sólo renombres, milisegundos con el lock tomado
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("ALTER TABLE products RENAME TO products_old")
+        conn.execute(f"ALTER TABLE {STAGING_TABLE} RENAME TO products")
+        if has_fts:
+            conn.execute("ALTER TABLE products_fts RENAME TO products_fts_old")
+            conn.execute(f"ALTER TABLE {STAGING_FTS_TABLE} RENAME TO products_fts")
+        _bump_catalog_generation(conn)
+    catalog_snapshot.invalidate()
+
+    # 4) Borrar el catálogo anterior fuera del intercambio
+    with conn:
+        conn.execute("DROP TABLE IF EXISTS products_old")
+        conn.execute("DROP TABLE IF EXISTS products_fts_old")
+    return stats
+
+def count_products() -> int:
+    return get_connection().execute("SELECT COUNT(*) FROM products").fetchone()[0]
 
 def get_product_by_barcode(barcode: str):
     """
     Retorna un dict con { 'id': <int>, 'barcode': <str>, 'name': <str>, 'unit_price': <float> }
     o None si no existe en la base local.
     """
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+    if CATALOG_SNAPSHOT_ENABLED:
+        product = catalog_snapshot.lookup(barcode)
+        if product is not catalog_snapshot.UNAVAILABLE:
+            return product
 
-    cursor.execute("SELECT id, barcode, name, unit_price FROM products WHERE barcode = ?", (barcode,))
-    row = cursor.fetchone()
-    conn.close()
+    conn = get_connection()
+    row = conn.execute(
+        "SELECT id, barcode, name, unit_price FROM products WHERE barcode = ?", (barcode,)
+    ).fetchone()
 
     if row:
         return {
@@ -74,3 +338,102 @@ def get_product_by_barcode(barcode: str):
             "unit_price": row[3]
         }
     return None
+
+def get_products_by_barcodes(barcodes) -> dict:
+    """
+    Busca muchos códigos de una vez. Retorna {barcode: producto} sólo con los que existen
+    (mismo formato que get_product_by_barcode).
+    Con el snapshot disponible no toca SQLite; si no, es UNA consulta indexada.
+    """
+    codes = list(dict.fromkeys(str(code) for code in barcodes if code))
+    if not codes:
+        return {}
+
+    if CATALOG_SNAPSHOT_ENABLED:
+        found = {}
+        for code in codes:
+            product = catalog_snapshot.lookup(code)
+            if product is catalog_snapshot.UNAVAILABLE:
+                break
+            if product:
+                found[code] = product
+        else:
+            return found
+
+    rows = get_connection().execute(
+        "SELECT id, barcode, name, unit_price FROM products "
+        "WHERE barcode IN (SELECT value FROM json_each(?))",
+        (json.dumps(codes),)
+    ).fetchall()
+    return {
+        row[1]: {"id": row[0], "barcode": row[1], "name": row[2], "unit_price": row[3]}
+        for row in rows
+    }
+
+def search_products_by_name(text: str, limit: int = 10) -> list:
+    """
+    Búsqueda por prefijo sobre el nombre ("lech desc" encuentra "Leche Descremada").
+    Retorna una lista de dicts con el mismo formato que get_product_by_barcode.
+    """
+    terms = re.findall(r"\w+", text.lower())
+    if not terms:
+        return []
+
+    conn = get_connection()
+    if _has_fts(conn):
+        # Cada término entre comillas (escapa la sintaxis FTS5) y con '*' de prefijo
+        match = " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        # Sin ORDER BY rank: calcular bm25 sobre miles de coincidencias de un
+        # prefijo corto cuesta decenas de ms, y el typeahead necesita < 20 ms.
+        rows = conn.execute("""
+            SELECT p.id, p.barcode, p.name, p.unit_price
+            FROM (SELECT rowid FROM products_fts WHERE products_fts MATCH ? LIMIT ?) f
+            JOIN products p ON p.id = f.rowid
+            ORDER BY p.name
+        """, (match, limit)).fetchall()
+    else:
+        where = " AND ".join("name LIKE ?" for _ in terms)
+        rows = conn.execute(
+            f"SELECT id, barcode, name, unit_price FROM products WHERE {where} ORDER BY name LIMIT ?",
+            [f"%{term}%" for term in terms] + [limit]
+        ).fetchall()
+
+    return [
+        {"id": row[0], "barcode": row[1], "name": row[2], "unit_price": row[3]}
+        for row in rows
+    ]
+
+def _has_fts(conn) -> bool:
+    """True si la migración pudo crear products_fts (SQLite con FTS5)."""
+    global _fts_enabled
+    if _fts_enabled is None:
+        _fts_enabled = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'products_fts'"
+        ).fetchone() is not None
+    return _fts_enabled
+
+############################################
+# Estado local (tabla meta)
+############################################
+def get_meta(key: str, default=None):
+    """Lee un valor de la tabla meta (siempre como str) o 'default' si no existe."""
+    row = get_connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+def set_meta(key: str, value):
+    """Guarda (o reemplaza) un valor en la tabla meta."""
+    conn = get_connection()
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+def delete_meta(key: str):
+    conn = get_connection()
+    with conn:
+        conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+
+def _bump_catalog_generation(conn):
+    """Incrementa la generación del catálogo dentro de la transacción en curso."""
+    conn.execute("""
+        INSERT INTO meta (key, value) VALUES ('catalog_generation', '1')
+        ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+    """)
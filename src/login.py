@@ -3,17 +3,16 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox
 from PyQt6.QtGui import QFont, QGuiApplication
 from PyQt6.QtCore import Qt
-from qt_material import apply_stylesheet
 
 from src.constants import API_BASE_URL, ACCESS_TOKEN_FILE, REFRESH_TOKEN_FILE, HOST_FILE
-from src.pos import POSWindow
-from src.sync_worker import SyncWorker
-from src.loading_dialog import MaterialLoadingDialog
-from src.login_worker import LoginWorker
+
+# El POS, los workers y la pila de red se importan recién cuando se usan:
+# la primera pantalla es sólo este formulario (ver startup_timeline.py)
 
 class LoginWindow(QWidget):
     def __init__(self):
         super().__init__()
+        self.login_worker = None  # Tarea de red en curso (ver network_engine.py)
 
         self.setWindowTitle("Inicio de Sesión")
         self.setFixedSize(400, 300)  # Tamaño fijo similar al ejemplo
@@ -105,6 +104,9 @@ class LoginWindow(QWidget):
         self.move(center_x, center_y)
 
     def login(self):
+        if self.login_worker is not None and self.login_worker.isRunning():
+            return  # Ya hay una petición en curso (doble clic)
+
         email = self.email_input.text().strip()
         password = self.password_input.text().strip()
 
@@ -112,6 +114,9 @@ class LoginWindow(QWidget):
             QMessageBox.critical(self, "Error", "Completa los campos de email y password.")
             return
 
+        from src.loading_dialog import MaterialLoadingDialog
+        from src.login_worker import LoginWorker
+
         # Mostrar el diálogo de carga
         self.loading_dialog = MaterialLoadingDialog(self, "Iniciando sesión, por favor espere...")
         self.loading_dialog.show()
@@ -126,29 +131,16 @@ class LoginWindow(QWidget):
             self.loading_dialog.close()
             QMessageBox.critical(self, "Error de login", str(result))
         else:
-            # Login exitoso: se actualiza el mensaje y se inicia la sincronización
-            self.loading_dialog.label.setText("Sincronizando productos, por favor espere...")
-            self.start_sync()
-
-    def start_sync(self):
-        # Iniciar SyncWorker en segundo plano
-        self.sync_worker = SyncWorker()
-        self.sync_worker.finished.connect(self.handle_sync_finished)
-        self.sync_worker.start()
-
-    def handle_sync_finished(self, result):
-        self.loading_dialog.close()
-        if isinstance(result, Exception):
-            QMessageBox.warning(self, "Error de sincronización", f"Hubo un error al sincronizar: {result}")
-            return
-
-        # Luego de la sincronización, se consulta el estado de la caja
-        from src.check_cash_register_status_worker import CheckCashRegisterStatusWorker
-        self.status_worker = CheckCashRegisterStatusWorker()
-        self.status_worker.finished.connect(self.handle_status_finished)
-        self.status_worker.start()
+            # Login exitoso: estado de la caja y sincronización a la vez
+            # (ver startup_orchestrator.py); la ventana se abre con el estado
+            self.loading_dialog.label.setText("Consultando el estado de la caja...")
+            from src.startup_orchestrator import PostLoginStartup
+            self.startup = PostLoginStartup(self)
+            self.startup.status_ready.connect(self.handle_status_finished)
+            self.startup.start()
 
     def handle_status_finished(self, result):
+        self.loading_dialog.close()
         if isinstance(result, Exception):
             QMessageBox.critical(self, "Error", f"Error al consultar el estado de la caja: {result}")
             return
@@ -156,6 +148,10 @@ class LoginWindow(QWidget):
         # Se asume que la respuesta es un JSON con la clave "is_open"
         if result.get("is_open", False):
             # Si la caja está abierta, se abre el POS directamente.
+            # Si se abrió en otro equipo, se crea la sesión local para el cierre.
+            from src.sales_ledger import ensure_open_session
+            ensure_open_session(result.get("opening_amount") or 0, server_id=result.get("id"))
+            from src.pos import POSWindow
             self.pos_window = POSWindow()
             self.pos_window.show()
         else:
@@ -1,12 +1,10 @@
-from PyQt6.QtCore import QThread, pyqtSignal
-import requests
+from src.network_engine import NetworkTask, Priority
+from src.http_client import request
+from src.utils import TOKENS
 
-from src.constants import API_BASE_URL, ACCESS_TOKEN_FILE, REFRESH_TOKEN_FILE, HOST_FILE
-from src.utils import read_file, write_file
-
-class LoginWorker(QThread):
+class LoginWorker(NetworkTask):
     # Emite el resultado: un diccionario con la respuesta en caso de éxito, o una excepción en caso de error.
-    finished = pyqtSignal(object)
+    priority = Priority.INTERACTIVE
 
     def __init__(self, email: str, password: str):
         super().__init__()
@@ -14,25 +12,18 @@ class LoginWorker(QThread):
         self.password = password
 
     def run(self):
-        try:
-            host = read_file(HOST_FILE)
-            if not host:
-                raise Exception("El Host no está configurado.")
-            url = f"{API_BASE_URL}/auth/login"
-            data = {"email": self.email, "password": self.password}
-            headers = {"Accept": "application/json", "Host": host}
-            response = requests.post(url, headers=headers, data=data)
-            if response.status_code == 200:
-                resp_json = response.json()
-                access_token = resp_json.get("access_token")
-                refresh_token = resp_json.get("refresh_token")
-                if access_token and refresh_token:
-                    write_file(ACCESS_TOKEN_FILE, access_token)
-                    write_file(REFRESH_TOKEN_FILE, refresh_token)
-                    self.finished.emit(resp_json)
-                else:
-                    raise Exception("No se obtuvieron los tokens en la respuesta.")
-            else:
-                raise Exception(f"Error al iniciar sesión. Código: {response.status_code}")
-        except Exception as e:
-            self.finished.emit(e)
+        host = TOKENS.host
+        if not host:
+            raise Exception("El Host no está configurado.")
+        data = {"email": self.email, "password": self.password}
+        headers = {"Accept": "application/json", "Host": host}
+        response = request("POST", "/auth/login", headers=headers, data=data)
+        if response.status_code == 200:
+            resp_json = response.json()
+            access_token = resp_json.get("access_token")
+            refresh_token = resp_json.get("refresh_token")
+            if access_token and refresh_token:
+                TOKENS.set_tokens(access_token, refresh_token)
+                return resp_json
+            raise Exception("No se obtuvieron los tokens en la respuesta.")
+        raise Exception(f"Error al iniciar sesión. Código: {response.status_code}")
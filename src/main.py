@@ -9,23 +9,56 @@ else:
 
 sys.path.insert(0, base_path)  # Asegurar que `src` esté en sys.path
 
-# Importaciones con rutas absolutas
+# Primero: mide el arranque desde aquí (sólo biblioteca estándar)
+from src import startup_timeline
+
+# Importaciones con rutas absolutas. Sólo lo necesario para la primera
+# ventana: el POS, los workers y la pila de red se cargan al usarse.
 from src.constants import HOST_FILE
-from src.login import LoginWindow
+from src.db_connection import close_all_connections, close_connection
+from src.local_db import init_db
 
 from PyQt6.QtWidgets import QApplication
 
+def start_network_engine():
+    """Crea el motor de red compartido (en el hilo de la GUI), ya con la ventana en pantalla."""
+    from src.network_engine import get_engine
+    get_engine()
+    startup_timeline.mark("network_engine")
+
+def shutdown():
+    """
+    Detiene el motor de red y recién entonces cierra las conexiones a SQLite:
+    si alguna tarea sigue corriendo tras el tope de espera, sólo se cierra la
+    del hilo de la GUI (la base en WAL queda consistente al terminar el proceso).
+    """
+    from src.network_engine import shutdown_engine
+    if shutdown_engine():
+        close_all_connections()
+    else:
+        close_connection()
+
 def main():
+    startup_timeline.mark("imports")
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(shutdown)
+    startup_timeline.mark("qapplication")
+
+    # Migraciones del schema local: una sola vez al arrancar
+    init_db()
+    startup_timeline.mark("init_db")
 
     # Verificar si existe el archivo de configuración
     if os.path.exists(HOST_FILE):
-        login_window = LoginWindow()
-        login_window.show()
+        from src.login import LoginWindow
+        window = LoginWindow()
     else:
         from src.host_config import HostConfigWindow
-        host_window = HostConfigWindow()
-        host_window.show()
+        window = HostConfigWindow()
+    startup_timeline.mark("window_built")
+    # Al pintarse la primera ventana se registra el tiempo y recién ahí se crea el motor de red
+    startup_timeline.watch_first_window(window, then=start_network_engine)
+    window.show()
 
     sys.exit(app.exec())
 
@@ -0,0 +1,213 @@
+# migrations.py
+
+import secrets
+import sqlite3
+
+############################################
+# Migraciones del schema local
+############################################
+# Cada migración es una función que recibe la conexión y modifica el schema.
+# La versión aplicada se guarda en PRAGMA user_version del propio archivo,
+# así que cada migración corre una sola vez por base de datos.
+# Para cambiar el schema: agregar una función nueva AL FINAL de MIGRATIONS,
+# nunca editar una migración ya publicada.
+
+
+def _m001_create_products(conn: sqlite3.Connection):
+    """Tabla base de productos. Descarta tablas antiguas sin columna 'id'."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(products)")]
+    if columns and "id" not in columns:
+        # Versiones muy antiguas no tenían 'id': los datos no se pueden
+        # mapear, la próxima sincronización vuelve a poblar la tabla.
+        print("DEBUG: migración 1 -> descartando tabla products sin columna id.")
+        conn.execute("DROP TABLE products")
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY,
+        barcode TEXT,
+        name TEXT,
+        unit_price REAL
+    )
+    """)
+
+
+def _m002_unique_barcode_index(conn: sqlite3.Connection):
+    """
+    Índice único sobre barcode para que get_product_by_barcode no recorra la tabla.
+    Los códigos vacíos pasan a NULL (el índice único admite varios NULL) y,
+    ante códigos duplicados, se conserva el producto con el id más alto.
+    """
+    conn.execute("UPDATE products SET barcode = NULL WHERE TRIM(barcode) = ''")
+    conn.execute("""
+        DELETE FROM products
+        WHERE barcode IS NOT NULL
+          AND id NOT IN (
+              SELECT MAX(id) FROM products
+              WHERE barcode IS NOT NULL
+              GROUP BY barcode
+          )
+    """)
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_products_barcode ON products(barcode)")
+
+
+def _m003_meta_table(conn: sqlite3.Connection):
+    """Tabla clave/valor para estado local (generación del catálogo, cursores, etc.)."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """)
+
+
+def _m004_products_content_hash(conn: sqlite3.Connection):
+    """Hash del contenido de cada fila para que save_products omita las que no cambiaron."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(products)")]
+    if "content_hash" not in columns:
+        conn.execute("ALTER TABLE products ADD COLUMN content_hash INTEGER")
+
+
+def _m005_products_fts(conn: sqlite3.Connection):
+    """
+    Índice FTS5 sobre products.name para la búsqueda por nombre (rowid = products.id).
+    Si el SQLite del sistema no trae FTS5, se omite y la búsqueda usa LIKE.
+    """
+    try:
+        conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+            name,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """)
+    except sqlite3.OperationalError as e:
+        print(f"FTS5 no disponible, búsqueda por nombre sin índice: {e}")
+        return
+    conn.execute("DELETE FROM products_fts")
+    conn.execute("INSERT INTO products_fts (rowid, name) SELECT id, name FROM products")
+
+
+def _m006_sales_outbox(conn: sqlite3.Connection):
+    """Cola local de ventas pendientes de enviar a /sales (ver sales_outbox.py)."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS sales_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        idempotency_key TEXT NOT NULL UNIQUE,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL DEFAULT 0,
+        last_error TEXT,
+        created_at REAL NOT NULL,
+        sent_at REAL
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_outbox_status ON sales_outbox(status, id)")
+
+
+def _m007_sales_ledger(conn: sqlite3.Connection):
+    """
+    Libro local de ventas por sesión de caja (ver sales_ledger.py).
+    cash_sessions y session_product_totals guardan totales acumulados para
+    que el cierre de caja no tenga que recorrer las ventas.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS cash_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        server_id INTEGER,
+        opening_amount_cents INTEGER NOT NULL DEFAULT 0,
+        opened_at REAL NOT NULL,
+        closed_at REAL,
+        closing_amount_cents INTEGER,
+        sales_count INTEGER NOT NULL DEFAULT 0,
+        sales_total_cents INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS sales (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id INTEGER NOT NULL REFERENCES cash_sessions(id),
+        outbox_id INTEGER REFERENCES sales_outbox(id),
+        created_at REAL NOT NULL,
+        total_cents INTEGER NOT NULL
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_session ON sales(session_id)")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS sale_items (
+        sale_id INTEGER NOT NULL REFERENCES sales(id),
+        product_id INTEGER NOT NULL,
+        barcode TEXT,
+        name TEXT,
+        quantity INTEGER NOT NULL,
+        unit_price_cents INTEGER NOT NULL,
+        line_total_cents INTEGER NOT NULL
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sale_items_sale ON sale_items(sale_id)")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS session_product_totals (
+        session_id INTEGER NOT NULL,
+        product_id INTEGER NOT NULL,
+        name TEXT,
+        quantity INTEGER NOT NULL DEFAULT 0,
+        total_cents INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (session_id, product_id)
+    ) WITHOUT ROWID
+    """)
+
+
+def _m008_catalog_instance(conn: sqlite3.Connection):
+    """
+    Id aleatorio de esta base (meta.catalog_instance). La generación vuelve a
+    empezar en 1 si se recrea products.db, así que el snapshot del catálogo
+    (ver catalog_snapshot.py) se valida con el par (instancia, generación).
+    """
+    conn.execute(
+        "INSERT OR IGNORE INTO meta (key, value) VALUES ('catalog_instance', ?)",
+        (str(secrets.randbits(63)),)
+    )
+
+
+# Orden estricto: (versión, función)
+MIGRATIONS = [
+    (1, _m001_create_products),
+    (2, _m002_unique_barcode_index),
+    (3, _m003_meta_table),
+    (4, _m004_products_content_hash),
+    (5, _m005_products_fts),
+    (6, _m006_sales_outbox),
+    (7, _m007_sales_ledger),
+    (8, _m008_catalog_instance),
+]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """
+    Aplica en orden las migraciones pendientes, cada una en su propia transacción.
+    Retorna la versión final del schema.
+    """
+    for version, migration in MIGRATIONS:
+        if version <= get_schema_version(conn):
+            continue
+
+        # BEGIN IMMEDIATE toma el lock de escritura antes de releer la versión,
+        # así dos procesos arrancando a la vez no aplican la misma migración.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version <= get_schema_version(conn):
+                conn.rollback()
+                continue
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"DEBUG: migración {version} aplicada ({migration.__name__}).")
+
+    return get_schema_version(conn)
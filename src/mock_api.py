@@ -0,0 +1,640 @@
+# mock_api.py
+
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+############################################
+# API falsa para pruebas de carga y de fallas
+############################################
+# Reemplaza al backend real en API_BASE_URL (http://localhost:8000/api):
+#   POST /auth/login, POST /auth/refresh
+#   GET  /products (paginado, updated_since, ETag/304), /products/snapshot (404)
+#   POST /sales (Idempotency-Key, cuerpo gzip)
+#   GET  /cash-register/status, POST /cash-register/open, /cash-register/close
+#   HEAD /health, GET /_mock/stats (contadores del propio mock)
+# Se puede configurar el tamaño del catálogo, la latencia, la tasa de errores
+# 503 y de conexiones cortadas, la vida de los tokens (401 al vencer), el
+# máximo de productos por página y cambios de precio periódicos.
+#
+# Uso (desde la raíz del repo):
+#   python -m src.mock_api serve --products 50000 --latency-ms 40 --error-rate 0.02
+#   python -m src.mock_api tills --tills 20 --duration 60 --out tills.json
+# "tills" levanta el mock y N cajas simuladas, cada una en su propio proceso
+# y directorio (base local, tokens y outbox propios), que usan el código real
+# de la app: login, sincronización, apertura de caja y ventas por la outbox.
+# Todas sincronizan a la vez al arrancar (tormenta de sincronización); al final
+# se reportan percentiles por métrica y las ventas por segundo que aceptó la API.
+
+MOCK_EMAIL_DOMAIN = "mock.local"
+MOCK_HOST = "mock.local"
+
+
+############################################
+# Catálogo sintético (también lo usa bench.py)
+############################################
+def synthetic_product(product_id: int, seed: int = 0) -> dict:
+    """Producto determinista para 'product_id' (mismo seed => mismo catálogo)."""
+    rnd = random.Random(product_id * 7919 + seed)
+    return {
+        "id": product_id,
+        "barcode": f"{7800000000000 + product_id:013d}",
+        "name": f"Producto {rnd.choice(('Leche', 'Pan', 'Arroz', 'Café', 'Jugo', 'Queso'))} {product_id}",
+        "unit_price": round(rnd.uniform(100, 20000), 2),
+        "updated_at": f"2025-01-01T00:00:00.{product_id:06d}"
+    }
+
+
+def synthetic_catalog(size: int, seed: int = 0) -> list:
+    return [synthetic_product(product_id, seed) for product_id in range(1, size + 1)]
+
+
+############################################
+# Estado del mock
+############################################
+class MockConfig:
+    """Parámetros del mock (los mismos que las opciones de la línea de comandos)."""
+
+    def __init__(self, products: int = 10000, seed: int = 0, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, error_rate: float = 0.0, drop_rate: float = 0.0,
+                 token_ttl_s: float = 3600, max_per_page: int = 1000, churn_per_min: int = 0):
+        self.products = products
+        self.seed = seed
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate        # Fracción de respuestas 503 (con Retry-After)
+        self.drop_rate = drop_rate          # Fracción de conexiones cortadas sin respuesta
+        self.token_ttl_s = token_ttl_s      # Vida del access token; vencido => 401
+        self.max_per_page = max_per_page
+        self.churn_per_min = churn_per_min  # Cambios de precio por minuto (para los delta)
+
+    @classmethod
+    def from_args(cls, args) -> "MockConfig":
+        return cls(products=args.products, seed=args.seed, latency_ms=args.latency_ms,
+                   jitter_ms=args.jitter_ms, error_rate=args.error_rate, drop_rate=args.drop_rate,
+                   token_ttl_s=args.token_ttl, max_per_page=args.max_per_page,
+                   churn_per_min=args.churn_per_min)
+
+
+def _b64(obj: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(obj).encode()).decode().rstrip("=")
+
+
+class MockState:
+    """Catálogo, tokens, cajas y ventas del mock (thread-safe)."""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.catalog = synthetic_catalog(config.products, config.seed)
+        self.access_tokens = {}    # token -> (usuario, vence)
+        self.refresh_tokens = {}   # token -> usuario
+        self.registers = {}        # usuario -> {'is_open', 'id', 'opening_amount'}
+        self.sales = {}            # Idempotency-Key -> id de la venta
+        self.sale_lines = 0
+        self.duplicate_sales = 0
+        self.counts = {}           # 'GET /products 200' -> n
+        self.started_at = time.time()
+        self._next_id = 1
+
+    def next_id(self) -> int:
+        with self.lock:
+            self._next_id += 1
+            return self._next_id
+
+    # ----- Tokens -----
+    def issue_tokens(self, user: str) -> dict:
+        """Access token con forma de JWT (la app lee 'exp' para refrescar antes de que venza)."""
+        exp = time.time() + self.config.token_ttl_s
+        access = ".".join((_b64({"alg": "none"}), _b64({"sub": user, "exp": int(exp), "jti": uuid.uuid4().hex}), "mock"))
+        refresh = uuid.uuid4().hex
+        with self.lock:
+            self.access_tokens[access] = (user, exp)
+            self.refresh_tokens[refresh] = user
+        return {"access_token": access, "refresh_token": refresh, "token_type": "bearer"}
+
+    def user_for(self, authorization: str) -> str | None:
+        token = (authorization or "").removeprefix("Bearer ").strip()
+        with self.lock:
+            entry = self.access_tokens.get(token)
+        if entry is None or entry[1] < time.time():
+            return None
+        return entry[0]
+
+    def rotate_refresh(self, authorization: str) -> dict | None:
+        token = (authorization or "").removeprefix("Bearer ").strip()
+        with self.lock:
+            user = self.refresh_tokens.pop(token, None)
+        return self.issue_tokens(user) if user else None
+
+    # ----- Catálogo -----
+    def change_random_price(self, rnd: random.Random):
+        with self.lock:
+            if not self.catalog:
+                return
+            index = rnd.randrange(len(self.catalog))
+            product = dict(self.catalog[index])
+            product["unit_price"] = round(product["unit_price"] * rnd.uniform(0.9, 1.1), 2)
+            product["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S") + f".{int(time.time() * 1e6) % 1000000:06d}"
+            self.catalog[index] = product
+
+    def products_page(self, page: int, per_page: int, since: str = None) -> dict:
+        with self.lock:
+            items = self.catalog
+        if since:
+            items = sorted((p for p in items if p["updated_at"] > since), key=lambda p: p["updated_at"])
+        per_page = max(1, min(per_page, self.config.max_per_page))
+        last_page = max(1, -(-len(items) // per_page))
+        return {
+            "items": items[(page - 1) * per_page:page * per_page],
+            "total": len(items),
+            "per_page": per_page,
+            "last_page": last_page
+        }
+
+    def count(self, key: str):
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "uptime_s": round(time.time() - self.started_at, 1),
+                "products": len(self.catalog),
+                "sales": len(self.sales),
+                "sale_lines": self.sale_lines,
+                "duplicate_sales": self.duplicate_sales,
+                "requests": dict(sorted(self.counts.items()))
+            }
+
+
+############################################
+# Servidor HTTP
+############################################
+class MockAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, como el servidor real
+    disable_nagle_algorithm = True  # Cabeceras y cuerpo van en dos envíos: sin esto, +40 ms por respuesta
+    state: MockState = None
+    base_path = ""
+
+    def log_message(self, *args):
+        pass
+
+    # ----- Respuestas -----
+    def _send_json(self, code: int, obj=None, headers: dict = None):
+        body = b"" if obj is None else json.dumps(obj).encode("utf-8")
+        self.send_response(code)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if obj is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+        self.state.count(f"{self.command} {self._route} {code}")
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if self.headers.get("Content-Encoding") == "gzip":
+            raw = gzip.decompress(raw)
+        return raw
+
+    def _form(self) -> dict:
+        return {key: values[0] for key, values in parse_qs(self._read_body().decode("utf-8")).items()}
+
+    def _json_body(self):
+        try:
+            return json.loads(self._read_body() or b"null")
+        except ValueError:
+            return None
+
+    # ----- Fallas simuladas -----
+    def _simulate_network(self) -> bool:
+        """Aplica latencia y fallas; retorna False si la petición ya quedó respondida (o cortada)."""
+        config = self.state.config
+        if config.latency_ms or config.jitter_ms:
+            delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+            time.sleep(max(0.0, delay) / 1000)
+        if config.drop_rate and random.random() < config.drop_rate:
+            self.state.count(f"{self.command} {self._route} dropped")
+            self.close_connection = True
+            return False
+        if config.error_rate and random.random() < config.error_rate:
+            self._read_body()
+            self._send_json(503, {"detail": "mock: error simulado"}, {"Retry-After": "1"})
+            return False
+        return True
+
+    def _authorized_user(self) -> str | None:
+        user = self.state.user_for(self.headers.get("Authorization"))
+        if user is None:
+            self._read_body()
+            self._send_json(401, {"detail": "Token inválido o vencido."})
+        return user
+
+    # ----- Ruteo -----
+    def _dispatch(self):
+        url = urlparse(self.path)
+        path = url.path
+        if self.base_path and path.startswith(self.base_path):
+            path = path[len(self.base_path):]
+        self._route = path
+        self._query = parse_qs(url.query)
+
+        if path == "/_mock/stats":
+            return self._send_json(200, self.state.stats())
+        if path == "/health":
+            return self._send_json(200, {"status": "ok"})
+        if not self._simulate_network():
+            return
+
+        handler = ROUTES.get((self.command, path))
+        if handler is None:
+            self._read_body()
+            return self._send_json(404, {"detail": "No encontrado."})
+        handler(self)
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_HEAD(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    # ----- Endpoints -----
+    def login(self):
+        form = self._form()
+        email, password = form.get("email", ""), form.get("password", "")
+        if not email or not password:
+            return self._send_json(401, {"detail": "Credenciales inválidas."})
+        self._send_json(200, self.state.issue_tokens(email))
+
+    def refresh(self):
+        tokens = self.state.rotate_refresh(self.headers.get("Authorization"))
+        if tokens is None:
+            return self._send_json(401, {"detail": "Refresh token inválido."})
+        self._send_json(200, tokens)
+
+    def products(self):
+        if self._authorized_user() is None:
+            return
+        page = int(self._query.get("page", ["1"])[0])
+        per_page = int(self._query.get("per_page", ["100"])[0])
+        since = self._query.get("updated_since", [None])[0]
+        data = self.state.products_page(page, per_page, since)
+
+        body = json.dumps(data).encode("utf-8")
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            return self._send_json(304, None, {"ETag": etag})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.state.count(f"GET {self._route} 200")
+
+    def sales(self):
+        user = self._authorized_user()
+        if user is None:
+            return
+        payload = self._json_body()
+        items = payload.get("items") if isinstance(payload, dict) else None
+        if not items or not all(isinstance(i, dict) and i.get("product_id") and i.get("quantity") for i in items):
+            return self._send_json(422, {"detail": "La venta no tiene ítems válidos."})
+
+        key = self.headers.get("Idempotency-Key") or uuid.uuid4().hex
+        with self.state.lock:
+            sale_id = self.state.sales.get(key)
+            duplicate = sale_id is not None
+            if duplicate:
+                self.state.duplicate_sales += 1
+            else:
+                sale_id = len(self.state.sales) + 1
+                self.state.sales[key] = sale_id
+                self.state.sale_lines += len(items)
+        self._send_json(200 if duplicate else 201, {"id": sale_id, "message": "Venta registrada."})
+
+    def register_status(self):
+        user = self._authorized_user()
+        if user is None:
+            return
+        with self.state.lock:
+            register = dict(self.state.registers.get(user) or {"is_open": False})
+        self._send_json(200, register)
+
+    def register_open(self):
+        user = self._authorized_user()
+        if user is None:
+            return
+        amount = float(self._form().get("opening_amount") or 0)
+        register_id = self.state.next_id()
+        with self.state.lock:
+            self.state.registers[user] = {"is_open": True, "id": register_id, "opening_amount": amount}
+        self._send_json(201, {"id": register_id, "message": "Caja abierta correctamente."})
+
+    def register_close(self):
+        user = self._authorized_user()
+        if user is None:
+            return
+        amount = float(self._form().get("closing_amount") or 0)
+        with self.state.lock:
+            register = self.state.registers.get(user)
+            if not register or not register["is_open"]:
+                register = None
+            else:
+                register.update(is_open=False, closing_amount=amount)
+        if register is None:
+            return self._send_json(409, {"detail": "La caja no está abierta."})
+        self._send_json(200, {"message": "Caja cerrada correctamente."})
+
+
+ROUTES = {
+    ("POST", "/auth/login"): MockAPIHandler.login,
+    ("POST", "/auth/refresh"): MockAPIHandler.refresh,
+    ("GET", "/products"): MockAPIHandler.products,
+    ("POST", "/sales"): MockAPIHandler.sales,
+    ("GET", "/cash-register/status"): MockAPIHandler.register_status,
+    ("POST", "/cash-register/open"): MockAPIHandler.register_open,
+    ("POST", "/cash-register/close"): MockAPIHandler.register_close,
+}
+
+
+def start_server(config: MockConfig, address: str = None) -> tuple[ThreadingHTTPServer, MockState]:
+    """Levanta el mock en un hilo, en la dirección de API_BASE_URL (o 'address'). Retorna (server, state)."""
+    from src.constants import API_BASE_URL
+    url = urlparse(address or API_BASE_URL)
+    state = MockState(config)
+    handler = type("Handler", (MockAPIHandler,), {"state": state, "base_path": url.path.rstrip("/")})
+    server = ThreadingHTTPServer((url.hostname, url.port or 80), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-api", daemon=True).start()
+
+    if config.churn_per_min > 0:
+        def churn():
+            rnd = random.Random(config.seed)
+            while server.socket.fileno() != -1:
+                time.sleep(60 / config.churn_per_min)
+                state.change_random_price(rnd)
+        threading.Thread(target=churn, name="mock-api-churn", daemon=True).start()
+    return server, state
+
+
+def stop_server(server: ThreadingHTTPServer):
+    server.shutdown()
+    server.server_close()
+
+
+############################################
+# Cajas simuladas
+############################################
+def login_till(email: str, password: str = "mock"):
+    """Host + login por el mismo camino que la app (deja los tokens en el directorio actual)."""
+    from src.utils import TOKENS
+    from src.login_worker import LoginWorker
+    TOKENS.set_host(MOCK_HOST)
+    LoginWorker(email, password).run()
+
+
+def _with_retries(fn, attempts: int = 5):
+    """Como un cajero que reintenta: con --error-rate un 503 no debe tumbar la caja simulada."""
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.5 * (attempt + 1))
+
+
+def run_till(index: int, duration: float, sale_interval: float, lines_per_sale: int,
+             sync_interval: float, products: int, seed: int) -> dict:
+    """
+    Una caja: login, sincronización inicial, apertura de caja y ventas cada
+    ~sale_interval segundos (guardadas en el libro local y enviadas por la outbox),
+    con una sincronización delta cada sync_interval. Corre en el directorio actual.
+    """
+    from src.local_db import init_db, get_products_by_barcodes
+    from src.sync import sync_all_products
+    from src.cart import Cart
+    from src.sales_ledger import record_sale, ensure_open_session
+    from src.sales_outbox import flush_outbox, get_outbox_counts
+    from src.check_cash_register_status_worker import CheckCashRegisterStatusWorker
+    from src.open_cash_register_worker import OpenCashRegisterWorker
+
+    samples = {}
+    counters = {"sync_errors": 0, "sales_recorded": 0, "flush_errors": 0}
+
+    def timed(metric, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            samples.setdefault(metric, []).append(time.perf_counter() - start)
+
+    rnd = random.Random(seed * 1000 + index)
+    timed("till.login", _with_retries, lambda: login_till(f"till-{index}@{MOCK_EMAIL_DOMAIN}"))
+    init_db()
+    try:
+        timed("till.sync_initial", sync_all_products)
+    except Exception as e:
+        counters["sync_errors"] += 1
+        print(f"Caja {index}: sincronización inicial falló: {e}")
+
+    status = timed("till.register_status", _with_retries, CheckCashRegisterStatusWorker().run)
+    if not status.get("is_open"):
+        status = timed("till.register_open", _with_retries, OpenCashRegisterWorker(0).run)
+    ensure_open_session(0, server_id=status.get("id"))
+
+    deadline = time.time() + duration
+    next_sync = time.time() + sync_interval
+    while time.time() < deadline:
+        time.sleep(max(0.0, rnd.uniform(0.5, 1.5) * sale_interval))
+
+        barcodes = [synthetic_product(rnd.randint(1, products), seed)["barcode"] for _ in range(lines_per_sale)]
+        found = timed("till.lookup_batch", get_products_by_barcodes, barcodes)
+        cart = Cart()
+        for code in barcodes:
+            if code in found:
+                cart.add(found[code])
+        if len(cart):
+            timed("till.sale_record", record_sale, cart.lines())
+            counters["sales_recorded"] += 1
+        result = timed("till.sale_flush", flush_outbox)
+        if not result["ok"]:
+            counters["flush_errors"] += 1
+
+        if time.time() >= next_sync:
+            next_sync = time.time() + sync_interval
+            try:
+                timed("till.sync_delta", sync_all_products)
+            except Exception:
+                counters["sync_errors"] += 1
+
+    # Lo que quedó en la cola (backoff tras errores) se intenta una vez más
+    flush_outbox()
+    counters.update({f"outbox_{key}": value for key, value in get_outbox_counts().items()})
+    return {"samples": samples, "counters": counters}
+
+
+def _run_till_worker(args):
+    result = run_till(args.index, args.duration, args.sale_interval, args.lines_per_sale,
+                      args.sync_interval, args.products, args.seed)
+    with open(args.result_file, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+def run_tills(config: MockConfig, tills: int, duration: float, sale_interval: float,
+              lines_per_sale: int, sync_interval: float, start_mock: bool = True) -> dict:
+    """Levanta el mock (si corresponde) y 'tills' cajas en paralelo. Retorna el reporte."""
+    from src.bench import percentiles, REPO_ROOT
+    from src.constants import API_BASE_URL
+
+    server = state = None
+    if start_mock:
+        server, state = start_server(config)
+    workdirs = [tempfile.mkdtemp(prefix=f"postill-{index}-") for index in range(tills)]
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    started = time.perf_counter()
+    try:
+        procs = []
+        for index, workdir in enumerate(workdirs):
+            procs.append(subprocess.Popen(
+                [sys.executable, "-m", "src.mock_api", "till-worker", "--index", str(index),
+                 "--duration", str(duration), "--sale-interval", str(sale_interval),
+                 "--lines-per-sale", str(lines_per_sale), "--sync-interval", str(sync_interval),
+                 "--products", str(config.products), "--seed", str(config.seed),
+                 "--result-file", os.path.join(workdir, "result.json")],
+                cwd=workdir, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+            ))
+
+        merged, counters, failed = {}, {}, []
+        for index, proc in enumerate(procs):
+            output, _ = proc.communicate()
+            result_file = os.path.join(workdirs[index], "result.json")
+            if proc.returncode != 0 or not os.path.exists(result_file):
+                failed.append({"till": index, "output": output[-2000:]})
+                continue
+            with open(result_file, encoding="utf-8") as f:
+                result = json.load(f)
+            for metric, values in result["samples"].items():
+                merged.setdefault(metric, []).extend(values)
+            for key, value in result["counters"].items():
+                counters[key] = counters.get(key, 0) + value
+        elapsed = time.perf_counter() - started
+
+        server_stats = state.stats() if state else None
+        accepted = server_stats["sales"] if server_stats else None
+        return {
+            "meta": {
+                "api": API_BASE_URL,
+                "tills": tills,
+                "duration_s": duration,
+                "elapsed_s": round(elapsed, 2),
+                "sale_interval_s": sale_interval,
+                "lines_per_sale": lines_per_sale,
+                "sync_interval_s": sync_interval,
+                "config": vars(config)
+            },
+            "results": {metric: percentiles(values) for metric, values in sorted(merged.items())},
+            "counters": counters,
+            "sales_per_s": round(accepted / elapsed, 2) if accepted is not None else None,
+            "server": server_stats,
+            "failed_tills": failed
+        }
+    finally:
+        if server is not None:
+            stop_server(server)
+        for workdir in workdirs:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+############################################
+# Línea de comandos
+############################################
+def _add_mock_options(parser):
+    parser.add_argument("--products", type=int, default=10000, help="Tamaño del catálogo.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia agregada a cada respuesta.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="± variación de la latencia.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas 503.")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fracción de conexiones cortadas.")
+    parser.add_argument("--token-ttl", type=float, default=3600, help="Vida del access token (s).")
+    parser.add_argument("--max-per-page", type=int, default=1000, help="Máximo de productos por página.")
+    parser.add_argument("--churn-per-min", type=int, default=0, help="Cambios de precio por minuto.")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.mock_api", description="API falsa del POS.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Servir el mock en API_BASE_URL hasta Ctrl+C.")
+    _add_mock_options(serve)
+
+    tills = commands.add_parser("tills", help="Simular N cajas contra el mock.")
+    _add_mock_options(tills)
+    tills.add_argument("--tills", type=int, default=5)
+    tills.add_argument("--duration", type=float, default=30, help="Segundos de ventas por caja.")
+    tills.add_argument("--sale-interval", type=float, default=2.0, help="Segundos promedio entre ventas.")
+    tills.add_argument("--lines-per-sale", type=int, default=8)
+    tills.add_argument("--sync-interval", type=float, default=15, help="Segundos entre sincronizaciones delta.")
+    tills.add_argument("--external", action="store_true", help="No levantar el mock: usar uno ya corriendo.")
+    tills.add_argument("--out", help="Archivo JSON de salida (por defecto, stdout).")
+
+    worker = commands.add_parser("till-worker")
+    for name, kind in (("--index", int), ("--duration", float), ("--sale-interval", float),
+                       ("--lines-per-sale", int), ("--sync-interval", float), ("--products", int),
+                       ("--seed", int), ("--result-file", str)):
+        worker.add_argument(name, type=kind, required=True)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "till-worker":
+        _run_till_worker(args)
+        return 0
+
+    config = MockConfig.from_args(args)
+    if args.command == "serve":
+        from src.constants import API_BASE_URL
+        server, _ = start_server(config)
+        print(f"Mock de la API en {API_BASE_URL} ({config.products} productos). Ctrl+C para salir.")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop_server(server)
+        return 0
+
+    report = run_tills(config, args.tills, args.duration, args.sale_interval,
+                       args.lines_per_sale, args.sync_interval, start_mock=not args.external)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 1 if report["failed_tills"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+# network_engine.py
+
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from enum import IntEnum
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from src.constants import NETWORK_MAX_CONCURRENCY, NETWORK_SHUTDOWN_TIMEOUT_S
+
+############################################
+# Motor de red único
+############################################
+# En vez de crear un QThread por petición, cada acción de red es una
+# NetworkTask que se encola en un único motor:
+# - Un hilo dedicado corre un event loop de asyncio que toma las tareas de una
+#   cola con prioridad (las ventas pasan antes que la sincronización).
+# - Como el cliente HTTP es bloqueante (requests), cada tarea corre en un pool
+#   fijo de NETWORK_MAX_CONCURRENCY hilos que se reutilizan; el semáforo del
+#   loop garantiza que nunca haya más tareas en curso que hilos.
+# - Los resultados llegan a Qt con la señal 'finished' de la tarea, que se
+#   entrega en el hilo de la GUI (conexión encolada).
+# - cancel() descarta una tarea en cola; si ya está corriendo, su resultado
+#   no se emite (la tarea puede consultar is_cancelled para cortar antes).
+# - shutdown() cancela todo y espera, con tope, a que terminen las tareas que
+#   ya estaban corriendo; recién entonces se pueden cerrar las conexiones a
+#   SQLite que usan los hilos del pool.
+
+
+class Priority(IntEnum):
+    SALES = 0           # Envío de ventas (outbox)
+    INTERACTIVE = 10    # Login, apertura/cierre de caja: el usuario está esperando
+    SYNC = 20           # Sincronización del catálogo
+
+
+class NetworkTask(QObject):
+    """
+    Acción de red para el motor. Las subclases implementan run(), que corre en
+    un hilo del pool y retorna el resultado o lanza una excepción.
+    'finished' emite el resultado o la excepción (nunca si se canceló).
+    """
+    finished = pyqtSignal(object)
+    progress = pyqtSignal(int, int)
+
+    priority = Priority.INTERACTIVE
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cancelled = False
+        self._running = False
+        self._executing = False
+        self._lock = threading.Lock()  # cancel() vs. inicio de _execute()
+        self._done = threading.Event()
+
+    def run(self):
+        raise NotImplementedError
+
+    def start(self):
+        """Encola la tarea en el motor (mismo nombre que QThread.start para los llamadores)."""
+        self._running = True
+        get_engine().submit(self)
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def isRunning(self) -> bool:
+        """True mientras la tarea está en cola o ejecutándose."""
+        return self._running and not self._done.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Bloquea hasta que la tarea termine; retorna False si venció 'timeout'."""
+        return self._done.wait(timeout)
+
+    def _execute(self):
+        # Corre en un hilo del pool
+        try:
+            with self._lock:
+                if self._cancelled:
+                    return
+                self._executing = True
+            try:
+                result = self.run()
+            except Exception as e:
+                result = e
+            if not self._cancelled:
+                self.finished.emit(result)
+        finally:
+            self._done.set()
+
+
+class NetworkEngine(QObject):
+    """Event loop de asyncio en un hilo propio que despacha NetworkTask por prioridad."""
+    _released = pyqtSignal(object)
+
+    def __init__(self, max_concurrency: int = NETWORK_MAX_CONCURRENCY):
+        super().__init__()
+        self.max_concurrency = max_concurrency
+        self._seq = itertools.count()
+        # Las tareas se mantienen vivas hasta que su 'finished' llegó a la GUI
+        self._active = set()
+        self._released.connect(self._active.discard)
+
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="net")
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, name="network-engine", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.PriorityQueue()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        dispatcher = self._loop.create_task(self._dispatch())
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            dispatcher.cancel()
+            self._loop.run_until_complete(asyncio.gather(dispatcher, return_exceptions=True))
+            self._loop.close()
+
+    async def _dispatch(self):
+        while True:
+            # Tomar un cupo ANTES de sacar de la cola: así, cuando se libera uno,
+            # se elige la tarea de mayor prioridad en ese momento
+            await self._slots.acquire()
+            _, _, task = await self._queue.get()
+            if task.is_cancelled:
+                task._done.set()
+                self._slots.release()
+                self._released.emit(task)
+                continue
+            future = self._loop.run_in_executor(self._pool, task._execute)
+            future.add_done_callback(lambda _, task=task: self._on_task_done(task))
+
+    def _on_task_done(self, task):
+        self._slots.release()
+        self._released.emit(task)
+
+    def submit(self, task: NetworkTask):
+        """Encola 'task' (thread-safe)."""
+        self._active.add(task)
+        item = (int(task.priority), next(self._seq), task)
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+
+    def shutdown(self, timeout: float = NETWORK_SHUTDOWN_TIMEOUT_S) -> bool:
+        """
+        Cancela las tareas, detiene el loop y espera hasta 'timeout' segundos a
+        que terminen las que ya corrían (cortan entre páginas/ventas o por los
+        timeouts HTTP). Retorna True si el pool quedó libre.
+        """
+        deadline = time.monotonic() + timeout
+        tasks = list(self._active)
+        for task in tasks:
+            task.cancel()
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=timeout)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+        # Tras cancel() ninguna tarea nueva empieza: sólo quedan las que ya corrían
+        for task in tasks:
+            if task._executing and not task.wait(max(0.0, deadline - time.monotonic())):
+                print(f"DEBUG: {type(task).__name__} sigue corriendo tras {timeout} s.")
+                return False
+        return True
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> NetworkEngine:
+    """Motor compartido; se crea en el primer uso (debe ser desde el hilo de la GUI)."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = NetworkEngine()
+        return _engine
+
+
+def shutdown_engine() -> bool:
+    """Detiene el motor compartido. Retorna False si quedaron tareas corriendo."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            return True
+        drained = _engine.shutdown()
+        _engine = None
+        return drained
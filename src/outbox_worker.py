@@ -0,0 +1,96 @@
+# outbox_worker.py
+
+import time
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from src.constants import OUTBOX_POLL_INTERVAL_S, NETWORK_SHUTDOWN_TIMEOUT_S
+from src.network_engine import NetworkTask, Priority
+from src.sales_outbox import flush_outbox, get_outbox_counts, next_attempt_delay
+
+
+class FlushOutboxTask(NetworkTask):
+    """Un envío de la cola de ventas; tiene prioridad sobre la sincronización."""
+    priority = Priority.SALES
+
+    def run(self):
+        try:
+            result = flush_outbox(should_stop=lambda: self.is_cancelled)
+            status = get_outbox_counts()
+        except Exception as e:
+            result = {"ok": False, "error": str(e)}
+            status = {}
+        status.update(ok=result["ok"], error=result["error"], last_flush_at=time.time())
+
+        # Espera hasta el próximo reintento o el sondeo periódico
+        try:
+            delay = next_attempt_delay()
+        except Exception:
+            delay = None
+        status["next_flush_in"] = OUTBOX_POLL_INTERVAL_S if delay is None else min(delay, OUTBOX_POLL_INTERVAL_S)
+        return status
+
+
+class OutboxFlusher(QObject):
+    """
+    Envía las ventas de la cola local (sales_outbox) a través del motor de red.
+    Se despierta con wake() al confirmar una venta, cuando vence un reintento
+    o cada OUTBOX_POLL_INTERVAL_S segundos. Nunca hay dos envíos a la vez.
+    Emite 'status_changed' con {'pending', 'failed', 'ok', 'error', 'last_flush_at'}.
+    """
+    status_changed = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.task = None
+        self._pending = False
+        self._stopped = True
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.wake)
+
+    def start(self):
+        self._stopped = False
+        self.wake()
+
+    def wake(self):
+        """Pide un envío inmediato (llamar tras encolar una venta)."""
+        if self._stopped:
+            return
+        if self.task is not None and self.task.is_cancelled and not self.task.isRunning():
+            self.task = None  # Cancelado en stop() y terminado después
+        if self.task is not None:
+            self._pending = True  # Otro envío justo al terminar el actual
+            return
+
+        self.timer.stop()
+        self.task = FlushOutboxTask()
+        self.task.finished.connect(self._on_flushed)
+        self.task.start()
+
+    def stop(self, timeout: float = NETWORK_SHUTDOWN_TIMEOUT_S):
+        """
+        Detiene los envíos y cancela el que esté en curso (corta entre una
+        venta y otra), esperándolo a lo sumo 'timeout' segundos.
+        """
+        self._stopped = True
+        self._pending = False
+        self.timer.stop()
+        if self.task is not None:
+            self.task.cancel()
+            if self.task.wait(timeout):
+                self.task = None  # Cancelado: su 'finished' no llega
+            else:
+                print(f"DEBUG: el envío de ventas sigue en curso tras {timeout} s.")
+
+    def _on_flushed(self, status):
+        self.task = None
+        self.status_changed.emit(status)
+        if self._stopped:
+            return
+
+        if self._pending:
+            self._pending = False
+            self.wake()
+        else:
+            self.timer.start(int(status["next_flush_in"] * 1000))
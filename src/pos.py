@@ -1,17 +1,20 @@
 # src/pos.py
 
+import datetime
 import os
-from PyQt6.QtWidgets import (
-    QWidget, QHBoxLayout, QDialog, QLabel, QMessageBox, QTableWidgetItem,
-    QSpinBox, QPushButton
-)
-from PyQt6.QtCore import Qt
-from src.local_db import init_db, get_product_by_barcode
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QMessageBox
+from PyQt6.QtCore import Qt, QTimer
+from src.local_db import get_products_by_barcodes
 from src.pos_layout import build_left_container, build_right_container
 from src.pos_controller import connect_signals
-from src.sync import sync_all_products
-from src.sync_worker import SyncWorker   # Asegúrate de importar la clase SyncWorker
-from src.workers import WorkerThread     # Importamos el WorkerThread extraído
+from src.sales_outbox import get_outbox_counts
+from src.sales_ledger import record_sale
+from src.cart import Cart
+from src.outbox_worker import OutboxFlusher
+from src.connectivity import ConnectivityMonitor
+from src.product_search_worker import ProductSearchWorker
+from src.scan_input import ScanInputFilter, ScanQueue
+from src.toast import Toast
 
 STYLE_SHEET = """
 /* Estilos generales */
@@ -46,11 +49,11 @@ QPushButton#ConfirmBtn:hover {
 }
 
 /* Tabla */
-QTableWidget {
+QTableView {
     border: 1px solid #ccc;
     gridline-color: #ccc;
 }
-QTableWidget::item {
+QTableView::item {
     padding: 5px;
 }
 QHeaderView::section {
@@ -60,26 +63,24 @@ QHeaderView::section {
     border: none;
 }
 """
-# Diálogo de carga para registrar ventas
-class LoadingDialog(QDialog):
-    """Diálogo modal con un mensaje de carga."""
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("Procesando...")
-        self.setModal(True)
-        self.setFixedSize(250, 100)
-        layout = QHBoxLayout(self)
-        self.label = QLabel("Registrando venta, por favor espere...")
-        layout.addWidget(self.label)
-
 class POSWindow(QWidget):
     """Ventana principal del POS, maneja la búsqueda de productos y su visualización."""
     
-    SYNC_INTERVAL_MS = 1 * 60 * 1000  # 1 minuto (ajusta según lo necesario)
+    TYPEAHEAD_DEBOUNCE_MS = 80        # Espera tras la última tecla antes de buscar
+    TYPEAHEAD_MIN_CHARS = 2
 
     def __init__(self):
         super().__init__()
-        init_db()  # Crea/actualiza la base local
+
+        # Hilo de búsqueda por nombre (typeahead); vive lo mismo que la ventana
+        self.search_worker = ProductSearchWorker()
+        self.search_worker.start()
+        self._typeahead_seq = 0
+        self._typeahead_products = {}
+        self._last_flush_line = ""
+
+        # Estado de la venta en curso; la tabla (CartTableModel) lo observa
+        self.cart = Cart()
 
         self.setWindowTitle("Venta de Productos")
         self.showMaximized() 
@@ -89,9 +90,26 @@ class POSWindow(QWidget):
         # 1) Construir la interfaz
         self._init_main_layout()
 
+        # 2) Entrada del lector: ráfagas de teclas -> cola -> resolución por lotes
+        self.scan_queue = ScanQueue(self)
+        self.scan_filter = ScanInputFilter(self)
+        self.scan_filter.watch(self.search_input)
+        self.scan_filter.watch(self.table)
+        self.toast = Toast(self)
+
         # 3) Conectar eventos (definidos en pos_controller.py)
         connect_signals(self)
 
+        # 4) Envío en segundo plano de las ventas guardadas localmente
+        self.outbox_flusher = OutboxFlusher()
+        self.outbox_flusher.status_changed.connect(self.on_outbox_status)
+        self.outbox_flusher.start()
+
+        # 5) Estado de la conexión con la API: al volver, enviar ventas y sincronizar
+        self.connectivity = ConnectivityMonitor(self)
+        self.connectivity.online_changed.connect(self.on_connectivity_changed)
+        self._show_connectivity(self.connectivity.is_online)
+
     def _init_main_layout(self):
         main_layout = QHBoxLayout(self)
 
@@ -106,91 +124,156 @@ class POSWindow(QWidget):
     # Métodos de Lógica / Eventos
     # ----------------------------------------------------------------
     def on_search_barcode(self):
-        """Maneja la búsqueda de un producto por código de barras."""
+        """Código ingresado a mano (Enter o botón Buscar): sigue el mismo camino que un escaneo."""
         barcode = self.search_input.text().strip()
         if not barcode:
-            QMessageBox.warning(self, "Atención", "Ingresa un código de barras.")
+            self.toast.show_message("Ingresa un código de barras.")
             return
+        self.scan_queue.enqueue(barcode)
+        self.search_input.clear()
 
-        product = get_product_by_barcode(barcode)
-        if product:
-            row_found = self.find_table_row_by_barcode(product["barcode"])
-            if row_found is not None:
-                self._increment_quantity_in_table(row_found)
+    def on_scanned(self, barcode: str):
+        """Código leído por el lector (ScanInputFilter); se resuelve con los demás del lote."""
+        self.scan_queue.enqueue(barcode)
+
+    def on_scans_resolved(self, results: list):
+        """Aplica un lote de códigos al carrito en orden de escaneo y avisa los faltantes sin bloquear."""
+        row = None
+        missing = []
+        for barcode, product in results:
+            if product:
+                row = self.cart.add(product)
             else:
-                self.add_product_to_table(product)
-        else:
-            QMessageBox.information(
-                self,
-                "Sin resultados",
-                f"No se encontró producto '{barcode}' en la base local."
+                missing.append(barcode)
+
+        if row is not None:
+            self.table.scrollTo(self.cart_model.index(row, 0))
+        if missing:
+            self.toast.show_message(
+                f"No se encontró en la base local: {', '.join(missing)}", beep=True
             )
 
-        self.search_input.clear()
+    def on_search_text_edited(self, text: str):
+        """Reinicia el debounce del typeahead con cada tecla."""
+        self._typeahead_seq += 1  # Invalida cualquier resultado en camino
+        text = text.strip()
+        # Sólo dígitos o teclas a velocidad de lector => es un código de barras, no se busca por nombre
+        if len(text) < self.TYPEAHEAD_MIN_CHARS or text.isdigit() or self.scan_filter.in_burst():
+            self.typeahead_timer.stop()
+            self.typeahead_model.setStringList([])
+            return
+        self.typeahead_timer.start()
+
+    def run_typeahead_search(self):
+        """Envía la consulta actual al hilo de búsqueda (tras el debounce)."""
+        self.search_worker.search(self._typeahead_seq, self.search_input.text().strip())
+
+    def on_typeahead_results(self, seq: int, products: list):
+        """Muestra las sugerencias si corresponden a lo último que se escribió."""
+        if seq != self._typeahead_seq:
+            return
+        self._typeahead_products = {}
+        for product in products:
+            label = f"{product['name']}  —  ${float(product['unit_price']):.2f}  ({product['barcode']})"
+            self._typeahead_products[label] = product
+        self.typeahead_model.setStringList(list(self._typeahead_products))
+        if products:
+            self.typeahead_completer.complete()
+
+    def on_typeahead_selected(self, label: str):
+        """Agrega a la venta el producto elegido en las sugerencias."""
+        product = self._typeahead_products.get(label)
+        if product:
+            self._add_or_increment_product(product)
+        self._typeahead_seq += 1
+        self.typeahead_model.setStringList([])
+        # El completer escribe la etiqueta en el campo después de esta señal
+        QTimer.singleShot(0, self.search_input.clear)
 
     def on_sync_products(self):
         """Sincroniza manualmente los productos con la nube sin bloquear la UI."""
-        self.sync_worker = SyncWorker()
-        self.sync_worker.finished.connect(self.handle_sync_finished)
-        self.sync_worker.start()
+        # Si ya hay una sincronización en curso, el scheduler corre una más al terminar
+        if not self.connectivity.is_online:
+            self.connectivity.probe_now()  # Al responder la API se sincroniza sola
+            return
+        self.sync_scheduler.trigger_now()
+
+    def on_sync_started(self):
+        """Muestra el indicador de sincronización (indeterminado hasta saber cuántas páginas hay)."""
+        self.sync_progress_bar.setRange(0, 0)
+        self.sync_progress_bar.setVisible(True)
+
+    def on_sync_progress(self, done: int, total: int):
+        if total > 0:
+            self.sync_progress_bar.setRange(0, total)
+            self.sync_progress_bar.setValue(done)
 
     def handle_sync_finished(self, result):
         """Maneja el resultado del hilo de sincronización."""
+        self.sync_progress_bar.setVisible(False)
         if isinstance(result, Exception):
             print(f"Error en sincronización: {result}")
         else:
             print(result)
 
     def on_confirmar_venta(self):
-        """Registra la venta usando un hilo para evitar congelar la UI."""
-        items = []
-        row_count = self.table.rowCount()
-
-        for row in range(row_count):
-            barcode_item = self.table.item(row, 0)
-            if not barcode_item:
-                continue
-
-            barcode_str = barcode_item.text().strip()
-            product_info = get_product_by_barcode(barcode_str)
-            if not product_info or 'id' not in product_info:
-                continue
-
-            product_id = product_info['id']
-            spin_widget = self.table.cellWidget(row, 3)
-            quantity = spin_widget.value() if spin_widget else 1
-
-            items.append({"product_id": product_id, "quantity": quantity})
+        """Registra la venta en el libro local y limpia la tabla sin esperar a la API."""
+        # Los escaneos que aún esperan su lote pertenecen a esta venta
+        self.scan_queue.flush()
+
+        # Las líneas ya traen id y precio desde el escaneo: no hace falta consultar la base
+        items = self.cart.lines()
+
+        # Sólo las líneas sin id (no debería pasar) se resuelven, todas en una consulta
+        unresolved = [line["barcode"] for line in items if line["product_id"] is None]
+        if unresolved:
+            products = get_products_by_barcodes(unresolved)
+            for line in items:
+                if line["product_id"] is None and line["barcode"] in products:
+                    line["product_id"] = products[line["barcode"]]["id"]
+            items = [line for line in items if line["product_id"] is not None]
 
         if not items:
             QMessageBox.warning(self, "Atención", "No hay productos para registrar la venta.")
             return
 
-        self.loading_dialog = LoadingDialog(self)
-        self.loading_dialog.show()
-
-        self.worker = WorkerThread(payload={"items": items})
-        self.worker.finished.connect(self.handle_finished)
-        self.worker.start()
-
-    def handle_finished(self, result):
-        """Maneja la respuesta del hilo secundario para el registro de la venta."""
-        self.loading_dialog.close()
-        if isinstance(result, Exception):
-            QMessageBox.critical(self, "Error", str(result))
-            return
-
-        response = result
-        if response.status_code == 201:
-            QMessageBox.information(self, "Venta Registrada", "Venta registrada con éxito.")
-            self._clear_table_and_total()
+        # La venta queda en el libro local y en la cola de envío (una transacción);
+        # el envío a la API lo hace OutboxFlusher
+        sale_id = record_sale(items)
+        self._clear_table_and_total()
+        self.outbox_flusher.wake()
+        self.on_outbox_status(dict(get_outbox_counts(), ok=None, error=None, last_flush_at=None))
+        print(f"Venta local {sale_id} registrada y encolada para envío.")
+
+    def on_outbox_status(self, status: dict):
+        """Muestra las ventas pendientes de envío y el resultado del último intento."""
+        text = f"Ventas pendientes de envío: {status.get('pending', 0)}"
+        if status.get("failed"):
+            text += f" · rechazadas: {status['failed']}"
+
+        if status.get("last_flush_at"):
+            hora = datetime.datetime.fromtimestamp(status["last_flush_at"]).strftime("%H:%M:%S")
+            resultado = "OK" if status.get("ok") else (status.get("error") or "error")
+            self._last_flush_line = f"Último envío {hora}: {resultado}"
+        if self._last_flush_line:
+            text += f"\n{self._last_flush_line}"
+
+        self.label_outbox_status.setText(text)
+
+    def on_connectivity_changed(self, online: bool):
+        self._show_connectivity(online)
+        if online:
+            # Ventas y catálogo que quedaron esperando la conexión
+            self.outbox_flusher.wake()
+            self.sync_scheduler.trigger_now()
+
+    def _show_connectivity(self, online: bool):
+        if online:
+            self.label_connection.setText("● En línea")
+            self.label_connection.setStyleSheet("color: #28a745;")
         else:
-            QMessageBox.critical(self, "Error al registrar venta", f"Código {response.status_code}:\n{response.text}")
-
-    def auto_sync(self):
-        """Sincroniza la base de datos local con la nube."""
-        sync_all_products()
-        print("Auto-sync completado.")
+            self.label_connection.setText("● Sin conexión: las ventas se guardan y se enviarán al volver")
+            self.label_connection.setStyleSheet("color: #dc3545;")
 
     def on_cancelar_venta(self):
         """Cancela la venta borrando los productos de la tabla, tras confirmación."""
@@ -202,75 +285,35 @@ class POSWindow(QWidget):
             QMessageBox.StandardButton.No
         )
         if confirm == QMessageBox.StandardButton.Yes:
+            self.scan_queue.flush()  # Que no caigan en la venta siguiente
             self._clear_table_and_total()
             QMessageBox.information(self, "Venta Cancelada", "La venta ha sido cancelada exitosamente.")
 
     # ----------------------------------------------------------------
     # Métodos de Apoyo
     # ----------------------------------------------------------------
-    def add_product_to_table(self, product: dict):
-        """Agrega un producto a la tabla."""
-        row_idx = self.table.rowCount()
-        self.table.insertRow(row_idx)
-
-        barcode_str = str(product.get("barcode", ""))
-        name_str = str(product.get("name", ""))
-        price_val = float(product.get("unit_price", 0.0))
-
-        self.table.setItem(row_idx, 0, QTableWidgetItem(barcode_str))
-        self.table.setItem(row_idx, 1, QTableWidgetItem(name_str))
-        self.table.setItem(row_idx, 2, QTableWidgetItem(f"${price_val:.2f}"))
-
-        spin_cantidad = QSpinBox()
-        spin_cantidad.setRange(1, 9999)
-        spin_cantidad.setValue(1)
-        spin_cantidad.valueChanged.connect(self.recalcular_total)
-        self.table.setCellWidget(row_idx, 3, spin_cantidad)
-
-        btn_delete = QPushButton("🗑")
-        btn_delete.clicked.connect(lambda checked, r=row_idx: self.on_delete_item(r))
-        self.table.setCellWidget(row_idx, 4, btn_delete)
-
-        self.recalcular_total()
-
-    def on_delete_item(self, row_idx: int):
-        """Elimina un producto de la tabla."""
-        self.table.removeRow(row_idx)
-        self.recalcular_total()
-
-    def recalcular_total(self):
-        """Recalcula el total de la venta."""
-        total = 0.0
-        row_count = self.table.rowCount()
-        for row in range(row_count):
-            price_str = self.table.item(row, 2).text()
-            price_val = float(price_str.replace("$", ""))
-            spin = self.table.cellWidget(row, 3)
-            quantity = spin.value() if spin else 1
-            total += price_val * quantity
+    def on_total_changed(self, total: float):
+        """Actualiza la etiqueta del total (el modelo del carrito avisa cada cambio)."""
         self.label_total_amount.setText(f"Total: ${total:.2f}")
 
-    def find_table_row_by_barcode(self, barcode: str) -> int | None:
-        """Encuentra un producto en la tabla por código de barras."""
-        for row in range(self.table.rowCount()):
-            item_barcode = self.table.item(row, 0)
-            if item_barcode and item_barcode.text() == barcode:
-                return row
-        return None
-
-    def _increment_quantity_in_table(self, row_idx: int):
-        spin = self.table.cellWidget(row_idx, 3)
-        if spin:
-            spin.setValue(spin.value() + 1)
-        self.recalcular_total()
+    def _add_or_increment_product(self, product: dict):
+        """Suma 1 si el producto ya está en el carrito; si no, lo agrega."""
+        row = self.cart.add(product)
+        self.table.scrollTo(self.cart_model.index(row, 0))
 
     def _clear_table_and_total(self):
-        """Borra el contenido de la tabla, resetea el total y limpia el campo de búsqueda."""
-        self.table.clearContents()
-        self.table.setRowCount(0)
-        self.label_total_amount.setText("Total: $0.00")
+        """Vacía el carrito (el total vuelve a $0.00) y limpia el campo de búsqueda."""
+        self.cart.clear()
         self.search_input.clear()
 
+    def closeEvent(self, event):
+        """Detiene los hilos de búsqueda, envío y sincronización antes de cerrar la ventana."""
+        self.connectivity.stop()
+        self.sync_scheduler.stop()
+        self.search_worker.stop()
+        self.outbox_flusher.stop()
+        super().closeEvent(event)
+
     def on_cerrar_caja(self):
         """Abre la ventana de cierre de caja para ingresar el monto de cierre."""
         from .cierre_caja import CierreCajaWindow
@@ -1,9 +1,5 @@
 
-from PyQt6.QtWidgets import QMessageBox, QTableWidgetItem, QPushButton
-from PyQt6.QtCore import QTimer
-
-from src.local_db import get_product_by_barcode, init_db
-from src.sync import sync_all_products
+from src.sync_scheduler import get_sync_scheduler
 
 def connect_signals(pos_window):
     """
@@ -14,6 +10,19 @@ def connect_signals(pos_window):
     pos_window.search_input.returnPressed.connect(pos_window.on_search_barcode)
     pos_window.btnBuscar.clicked.connect(pos_window.on_search_barcode)
 
+    # Lector de códigos: ráfaga detectada -> cola -> lote resuelto -> carrito
+    pos_window.scan_filter.scanned.connect(pos_window.on_scanned)
+    pos_window.scan_queue.resolved.connect(pos_window.on_scans_resolved)
+
+    # Typeahead por nombre: debounce -> hilo de búsqueda -> completer
+    pos_window.search_input.textEdited.connect(pos_window.on_search_text_edited)
+    pos_window.typeahead_timer.timeout.connect(pos_window.run_typeahead_search)
+    pos_window.search_worker.results_ready.connect(pos_window.on_typeahead_results)
+    pos_window.typeahead_completer.activated[str].connect(pos_window.on_typeahead_selected)
+
+    # Total de la venta: lo mantiene el modelo del carrito
+    pos_window.cart_model.total_changed.connect(pos_window.on_total_changed)
+
     # Botón Sync
     pos_window.btnSync.clicked.connect(pos_window.on_sync_products)
 
@@ -28,8 +37,13 @@ def connect_signals(pos_window):
     # envía el parámetro closing_amount a la API.
     pos_window.btn_cerrar_caja.clicked.connect(pos_window.on_cerrar_caja)
 
-    # Timer para autosincronización
-    pos_window.timer = QTimer(pos_window)
-    pos_window.timer.setInterval(pos_window.SYNC_INTERVAL_MS)
-    pos_window.timer.timeout.connect(pos_window.auto_sync)
-    pos_window.timer.start()
+    # Autosincronización en segundo plano (intervalo adaptativo con jitter).
+    # El scheduler es de la aplicación: puede venir sincronizando desde el login
+    pos_window.sync_scheduler = get_sync_scheduler()
+    pos_window.sync_scheduler.sync_started.connect(pos_window.on_sync_started)
+    pos_window.sync_scheduler.sync_progress.connect(pos_window.on_sync_progress)
+    pos_window.sync_scheduler.sync_finished.connect(pos_window.handle_sync_finished)
+    if pos_window.sync_scheduler.is_running:
+        pos_window.on_sync_started()
+        pos_window.on_sync_progress(*pos_window.sync_scheduler.progress)
+    pos_window.sync_scheduler.start()
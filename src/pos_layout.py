@@ -1,9 +1,10 @@
 from PyQt6.QtWidgets import (
     QHBoxLayout, QVBoxLayout, QFrame, QLabel, QLineEdit,
-    QPushButton, QComboBox, QTableWidget, QAbstractItemView,
-    QHeaderView, QWidget
+    QPushButton, QComboBox, QTableView, QAbstractItemView,
+    QHeaderView, QWidget, QCompleter, QProgressBar
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QStringListModel, QTimer
+from src.cart_model import CartTableModel, QuantityDelegate, DeleteButtonDelegate, COL_QUANTITY, COL_ACTIONS
 
 # 🔹 Estilos QSS integrados en línea
 
@@ -19,7 +20,17 @@ def build_left_container(parent) -> QFrame:
     search_layout = QHBoxLayout()
     lbl_search = QLabel("Código del Producto:")
     parent.search_input = QLineEdit()
-    parent.search_input.setPlaceholderText("Ingresa o escanea el código...")
+    parent.search_input.setPlaceholderText("Ingresa o escanea el código, o escribe el nombre...")
+
+    # Typeahead por nombre: las sugerencias las llena POSWindow desde FTS5
+    parent.typeahead_model = QStringListModel()
+    parent.typeahead_completer = QCompleter(parent.typeahead_model, parent.search_input)
+    parent.typeahead_completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+    parent.typeahead_completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+    parent.search_input.setCompleter(parent.typeahead_completer)
+    parent.typeahead_timer = QTimer(parent)
+    parent.typeahead_timer.setSingleShot(True)
+    parent.typeahead_timer.setInterval(parent.TYPEAHEAD_DEBOUNCE_MS)
     parent.btnBuscar = QPushButton("Buscar")
     parent.btnBuscar.setObjectName("BuscarBtn")
     parent.btnSync = QPushButton("Sync")
@@ -31,12 +42,20 @@ def build_left_container(parent) -> QFrame:
     search_layout.addWidget(parent.btnSync)
     layout.addLayout(search_layout)
 
-    # Tabla de productos
-    parent.table = QTableWidget()
-    parent.table.setColumnCount(5)
-    parent.table.setHorizontalHeaderLabels(["Código", "Descripción", "Precio", "Cantidad", "Acciones"])
-    parent.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    # Tabla de productos (modelo/vista: sólo se pintan las filas visibles)
+    parent.cart_model = CartTableModel(parent.cart, parent)
+    parent.table = QTableView()
+    parent.table.setModel(parent.cart_model)
+    parent.table.setItemDelegateForColumn(COL_QUANTITY, QuantityDelegate(parent.table))
+    parent.table.setItemDelegateForColumn(COL_ACTIONS, DeleteButtonDelegate(parent.table))
+    parent.table.setEditTriggers(
+        QAbstractItemView.EditTrigger.DoubleClicked
+        | QAbstractItemView.EditTrigger.SelectedClicked
+        | QAbstractItemView.EditTrigger.EditKeyPressed
+    )
+    parent.table.setMouseTracking(True)  # Hover del botón eliminar
     parent.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+    parent.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
     parent.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
     layout.addWidget(parent.table)
 
@@ -75,6 +94,25 @@ def build_right_container(parent) -> QFrame:
     parent.label_total_amount.setObjectName("TotalAmount")
     layout.addWidget(parent.label_total_amount, alignment=Qt.AlignmentFlag.AlignLeft)
 
+    # Conexión con la API (ver connectivity.py)
+    parent.label_connection = QLabel("● En línea")
+    parent.label_connection.setObjectName("ConnectionStatus")
+    parent.label_connection.setWordWrap(True)
+    layout.addWidget(parent.label_connection, alignment=Qt.AlignmentFlag.AlignLeft)
+
+    # Sincronización del catálogo en segundo plano (ver sync_scheduler.py)
+    parent.sync_progress_bar = QProgressBar()
+    parent.sync_progress_bar.setObjectName("SyncProgress")
+    parent.sync_progress_bar.setFormat("Sincronizando catálogo %v/%m")
+    parent.sync_progress_bar.setVisible(False)
+    layout.addWidget(parent.sync_progress_bar)
+
+    # Estado de la cola de ventas (ver sales_outbox.py)
+    parent.label_outbox_status = QLabel("Ventas pendientes de envío: 0")
+    parent.label_outbox_status.setObjectName("OutboxStatus")
+    parent.label_outbox_status.setWordWrap(True)
+    layout.addWidget(parent.label_outbox_status, alignment=Qt.AlignmentFlag.AlignLeft)
+
     layout.addSpacing(20)
 
     # Botones
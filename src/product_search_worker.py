@@ -0,0 +1,73 @@
+# product_search_worker.py
+
+import sqlite3
+import threading
+
+from PyQt6.QtCore import QThread, pyqtSignal
+from src.local_db import search_products_by_name
+from src.db_connection import get_connection, close_connection
+
+
+class ProductSearchWorker(QThread):
+    """
+    Hilo de larga duración para el typeahead de búsqueda por nombre.
+    Sólo guarda la ÚLTIMA consulta pedida: si llega una nueva antes de que la
+    anterior empiece, la anterior se descarta; si ya se está ejecutando, se
+    interrumpe. Emite 'results_ready' con (seq, lista de productos).
+    """
+    results_ready = pyqtSignal(int, list)
+
+    def __init__(self, limit: int = 10):
+        super().__init__()
+        self.limit = limit
+        self._cond = threading.Condition()
+        self._pending = None       # (seq, texto) a ejecutar
+        self._running_seq = None   # seq de la consulta en curso
+        self._conn = None
+        self._stopping = False
+
+    def search(self, seq: int, text: str):
+        """Encola una búsqueda (llamar desde el hilo de la UI)."""
+        with self._cond:
+            self._pending = (seq, text)
+            if self._running_seq is not None and self._conn is not None:
+                self._conn.interrupt()  # sqlite3_interrupt es seguro entre hilos
+            self._cond.notify()
+
+    def stop(self):
+        """Detiene el hilo y espera a que termine."""
+        with self._cond:
+            self._stopping = True
+            self._pending = None
+            self._cond.notify()
+        self.wait()
+
+    def run(self):
+        self._conn = get_connection()
+        try:
+            while True:
+                with self._cond:
+                    while self._pending is None and not self._stopping:
+                        self._cond.wait()
+                    if self._stopping:
+                        return
+                    seq, text = self._pending
+                    self._pending = None
+                    self._running_seq = seq
+
+                try:
+                    results = search_products_by_name(text, self.limit)
+                except sqlite3.OperationalError as e:
+                    # "interrupted": llegó una consulta más nueva
+                    if "interrupt" not in str(e):
+                        print(f"Error en búsqueda por nombre: {e}")
+                    results = None
+                finally:
+                    with self._cond:
+                        self._running_seq = None
+
+                if results is not None:
+                    self.results_ready.emit(seq, results)
+        finally:
+            self._conn = None
+            close_connection()
@@ -0,0 +1,206 @@
+# sales_ledger.py
+
+import time
+
+from src.db_connection import get_connection
+from src.sales_outbox import enqueue_sale
+
+############################################
+# Libro local de ventas por sesión de caja
+############################################
+# Cada venta confirmada se guarda en 'sales' + 'sale_items' y, en la MISMA
+# transacción, se encola para la API y se suman sus montos a la sesión de
+# caja abierta (cash_sessions) y a session_product_totals. Así el cierre de
+# caja lee totales ya calculados en vez de recorrer las ventas. Las pocas
+# ventas que la API rechaza de forma definitiva (outbox en 'failed') se
+# descuentan al armar el resumen: el servidor nunca las registró.
+# Montos siempre en centavos (int) para no acumular errores de float.
+
+
+def to_cents(amount) -> int:
+    return int(round(float(amount) * 100))
+
+
+def _open_session_row(conn):
+    return conn.execute("""
+        SELECT id, server_id, opening_amount_cents, opened_at, sales_count, sales_total_cents
+        FROM cash_sessions
+        WHERE closed_at IS NULL
+        ORDER BY id DESC
+        LIMIT 1
+    """).fetchone()
+
+
+def open_session(opening_amount, server_id=None) -> int:
+    """
+    Registra la apertura de caja y retorna el id local de la sesión.
+    Si quedó una sesión abierta de antes (p. ej. se cerró desde otro equipo),
+    se marca como cerrada sin monto de cierre.
+    """
+    conn = get_connection()
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        now = time.time()
+        conn.execute("UPDATE cash_sessions SET closed_at = ? WHERE closed_at IS NULL", (now,))
+        return conn.execute("""
+            INSERT INTO cash_sessions (server_id, opening_amount_cents, opened_at)
+            VALUES (?, ?, ?)
+        """, (server_id, to_cents(opening_amount), now)).lastrowid
+
+
+def ensure_open_session(opening_amount=0, server_id=None) -> int:
+    """
+    Retorna la sesión abierta; si no hay ninguna (caja abierta en otro equipo), la crea.
+    Si la sesión local pertenece a OTRA caja del servidor (la anterior se cerró
+    en otro equipo o la app se cerró antes del cierre), se cierra y se abre una
+    nueva: el cierre no debe sumar las ventas del turno anterior.
+    """
+    conn = get_connection()
+    row = _open_session_row(conn)
+    if row:
+        session_id, row_server_id = row[0], row[1]
+        if server_id is None or row_server_id == server_id:
+            return session_id
+        if row_server_id is None:
+            # Sesión creada sin conexión (ver record_sale): queda asociada a esta caja
+            with conn:
+                conn.execute("UPDATE cash_sessions SET server_id = ? WHERE id = ?", (server_id, session_id))
+            return session_id
+    return open_session(opening_amount, server_id)
+
+
+def close_session(closing_amount):
+    """Marca la sesión abierta como cerrada con el monto contado por el cajero."""
+    conn = get_connection()
+    with conn:
+        conn.execute("""
+            UPDATE cash_sessions SET closed_at = ?, closing_amount_cents = ?
+            WHERE closed_at IS NULL
+        """, (time.time(), to_cents(closing_amount)))
+
+
+def record_sale(lines: list) -> int:
+    """
+    Guarda una venta en el libro local y la encola para la API, todo en una transacción.
+    Cada línea: {'product_id', 'barcode', 'name', 'quantity', 'unit_price'}
+    (si trae 'unit_price_cents', como las de cart.Cart, se usa ése).
+    Retorna el id local de la venta.
+    """
+    items = []
+    total_cents = 0
+    for line in lines:
+        quantity = int(line["quantity"])
+        price_cents = line.get("unit_price_cents")
+        if price_cents is None:
+            price_cents = to_cents(line["unit_price"])
+        line_total = price_cents * quantity
+        total_cents += line_total
+        items.append((line["product_id"], line.get("barcode"), line.get("name"),
+                      quantity, price_cents, line_total))
+
+    payload = {"items": [{"product_id": item[0], "quantity": item[3]} for item in items]}
+
+    conn = get_connection()
+    with conn:
+        # Lock de escritura desde el inicio: la venta no debe fallar a medias
+        conn.execute("BEGIN IMMEDIATE")
+        row = _open_session_row(conn)
+        if row:
+            session_id = row[0]
+        else:
+            session_id = conn.execute(
+                "INSERT INTO cash_sessions (opening_amount_cents, opened_at) VALUES (0, ?)",
+                (time.time(),)
+            ).lastrowid
+
+        outbox_id = enqueue_sale(payload, conn)
+        sale_id = conn.execute("""
+            INSERT INTO sales (session_id, outbox_id, created_at, total_cents)
+            VALUES (?, ?, ?, ?)
+        """, (session_id, outbox_id, time.time(), total_cents)).lastrowid
+
+        conn.executemany("""
+            INSERT INTO sale_items
+                (sale_id, product_id, barcode, name, quantity, unit_price_cents, line_total_cents)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [(sale_id,) + item for item in items])
+
+        conn.executemany("""
+            INSERT INTO session_product_totals (session_id, product_id, name, quantity, total_cents)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(session_id, product_id) DO UPDATE SET
+                name = excluded.name,
+                quantity = quantity + excluded.quantity,
+                total_cents = total_cents + excluded.total_cents
+        """, [(session_id, item[0], item[2], item[3], item[5]) for item in items])
+
+        conn.execute("""
+            UPDATE cash_sessions
+            SET sales_count = sales_count + 1, sales_total_cents = sales_total_cents + ?
+            WHERE id = ?
+        """, (total_cents, session_id))
+
+    return sale_id
+
+
+def get_session_summary() -> dict | None:
+    """
+    Totales de la sesión abierta, listos para el cierre de caja:
+        {'session_id', 'opening_amount', 'sales_count', 'sales_total',
+         'expected_amount', 'rejected_count', 'rejected_total',
+         'products': [{'product_id', 'name', 'quantity', 'total'}]}
+    Las ventas rechazadas por la API no cuentan en los totales ni en el monto
+    esperado; se informan aparte en 'rejected_count' / 'rejected_total'.
+    Retorna None si no hay sesión abierta.
+    """
+    conn = get_connection()
+    row = _open_session_row(conn)
+    if row is None:
+        return None
+
+    session_id, _, opening_cents, _, sales_count, sales_cents = row
+    rejected_count, rejected_cents = conn.execute("""
+        SELECT COUNT(*), COALESCE(SUM(s.total_cents), 0)
+        FROM sales s JOIN sales_outbox o ON o.id = s.outbox_id
+        WHERE s.session_id = ? AND o.status = 'failed'
+    """, (session_id,)).fetchone()
+
+    rejected_items = {}
+    if rejected_count:
+        rejected_items = {
+            product_id: (quantity, cents)
+            for product_id, quantity, cents in conn.execute("""
+                SELECT i.product_id, SUM(i.quantity), SUM(i.line_total_cents)
+                FROM sales s
+                JOIN sales_outbox o ON o.id = s.outbox_id
+                JOIN sale_items i ON i.sale_id = s.id
+                WHERE s.session_id = ? AND o.status = 'failed'
+                GROUP BY i.product_id
+            """, (session_id,))
+        }
+
+    products = []
+    for product_id, name, quantity, cents in conn.execute("""
+        SELECT product_id, name, quantity, total_cents
+        FROM session_product_totals
+        WHERE session_id = ?
+    """, (session_id,)):
+        rejected_quantity, rejected_total = rejected_items.get(product_id, (0, 0))
+        quantity -= rejected_quantity
+        cents -= rejected_total
+        if quantity > 0:
+            products.append({"product_id": product_id, "name": name,
+                             "quantity": quantity, "total": cents / 100})
+    products.sort(key=lambda product: product["total"], reverse=True)
+
+    sales_cents -= rejected_cents
+    return {
+        "session_id": session_id,
+        "opening_amount": opening_cents / 100,
+        "sales_count": sales_count - rejected_count,
+        "sales_total": sales_cents / 100,
+        "expected_amount": (opening_cents + sales_cents) / 100,
+        "rejected_count": rejected_count,
+        "rejected_total": rejected_cents / 100,
+        "products": products
+    }
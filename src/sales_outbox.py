@@ -0,0 +1,134 @@
+# sales_outbox.py
+
+import json
+import time
+import uuid
+
+from src.constants import OUTBOX_BACKOFF_BASE_S, OUTBOX_BACKOFF_MAX_S
+from src.db_connection import get_connection
+from src.utils import request_with_refresh
+from src.circuit_breaker import OfflineError, can_attempt
+
+############################################
+# Cola local de ventas (outbox)
+############################################
+# Confirmar una venta sólo la escribe aquí; un hilo en segundo plano
+# (OutboxFlusher) la envía luego a POST /sales en orden de llegada.
+# Estados: 'pending' -> 'sent', o 'failed' si la API la rechaza de forma
+# definitiva (4xx). Los errores de red y 5xx se reintentan con backoff.
+
+# Códigos 4xx que sí vale la pena reintentar
+RETRYABLE_4XX = (401, 408, 425, 429)
+
+
+def enqueue_sale(payload: dict, conn=None) -> int:
+    """
+    Guarda una venta en la cola y retorna su id local.
+    Si se pasa 'conn', se asume que el llamador maneja la transacción.
+    """
+    own_transaction = conn is None
+    conn = conn or get_connection()
+    params = (str(uuid.uuid4()), json.dumps(payload), time.time())
+    sql = """
+        INSERT INTO sales_outbox (idempotency_key, payload, created_at)
+        VALUES (?, ?, ?)
+    """
+    if own_transaction:
+        with conn:
+            return conn.execute(sql, params).lastrowid
+    return conn.execute(sql, params).lastrowid
+
+
+def get_outbox_counts() -> dict:
+    """Retorna {'pending': n, 'failed': n} para mostrar en la UI."""
+    counts = dict(get_connection().execute(
+        "SELECT status, COUNT(*) FROM sales_outbox WHERE status IN ('pending', 'failed') GROUP BY status"
+    ).fetchall())
+    return {"pending": counts.get("pending", 0), "failed": counts.get("failed", 0)}
+
+
+def _next_pending(conn):
+    return conn.execute("""
+        SELECT id, idempotency_key, payload, attempts, next_attempt_at, last_error
+        FROM sales_outbox
+        WHERE status = 'pending'
+        ORDER BY id
+        LIMIT 1
+    """).fetchone()
+
+
+def next_attempt_delay() -> float | None:
+    """Segundos hasta que la venta más antigua pueda reintentarse (None si no hay)."""
+    row = _next_pending(get_connection())
+    if row is None:
+        return None
+    return max(0.0, row[4] - time.time())
+
+
+def flush_outbox(should_stop=None) -> dict:
+    """
+    Envía las ventas pendientes en orden hasta vaciar la cola o encontrar un error.
+    Una venta en backoff detiene el envío de las siguientes para no alterar el orden.
+    Sin conexión no se intenta nada ni se consumen reintentos.
+    'should_stop()' se consulta entre una venta y otra (cierre de la app).
+    Retorna {'sent': n, 'ok': bool, 'error': str | None}.
+    """
+    if not can_attempt():
+        return {"sent": 0, "ok": False, "error": "Sin conexión"}
+
+    conn = get_connection()
+    sent = 0
+
+    while True:
+        if should_stop and should_stop():
+            return {"sent": sent, "ok": False, "error": "Envío interrumpido"}
+        row = _next_pending(conn)
+        if row is None:
+            return {"sent": sent, "ok": True, "error": None}
+
+        sale_id, key, payload, attempts, next_attempt_at, last_error = row
+        if next_attempt_at > time.time():
+            return {"sent": sent, "ok": False, "error": last_error}
+
+        try:
+            response = request_with_refresh(
+                "POST", "/sales",
+                json=json.loads(payload),
+                headers={"Idempotency-Key": key},
+                compress=True  # Ventas mayoristas de cientos de líneas
+            )
+        except OfflineError as e:
+            return {"sent": sent, "ok": False, "error": str(e)}
+        except Exception as e:
+            _mark_retry(conn, sale_id, attempts, str(e))
+            return {"sent": sent, "ok": False, "error": str(e)}
+
+        if response.status_code in (200, 201):
+            with conn:
+                conn.execute(
+                    "UPDATE sales_outbox SET status = 'sent', sent_at = ?, attempts = ? WHERE id = ?",
+                    (time.time(), attempts + 1, sale_id)
+                )
+            sent += 1
+        elif 400 <= response.status_code < 500 and response.status_code not in RETRYABLE_4XX:
+            error = f"Código {response.status_code}: {response.text[:500]}"
+            with conn:
+                conn.execute(
+                    "UPDATE sales_outbox SET status = 'failed', last_error = ?, attempts = ? WHERE id = ?",
+                    (error, attempts + 1, sale_id)
+                )
+            print(f"Venta local {sale_id} rechazada por la API: {error}")
+        else:
+            error = f"Código {response.status_code}"
+            _mark_retry(conn, sale_id, attempts, error)
+            return {"sent": sent, "ok": False, "error": error}
+
+
+def _mark_retry(conn, sale_id: int, attempts: int, error: str):
+    delay = min(OUTBOX_BACKOFF_BASE_S * (2 ** attempts), OUTBOX_BACKOFF_MAX_S)
+    with conn:
+        conn.execute("""
+            UPDATE sales_outbox
+            SET attempts = ?, last_error = ?, next_attempt_at = ?
+            WHERE id = ?
+        """, (attempts + 1, error, time.time() + delay, sale_id))
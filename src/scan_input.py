@@ -0,0 +1,120 @@
+# scan_input.py
+
+import time
+from collections import deque
+
+from PyQt6.QtCore import QObject, QEvent, QTimer, Qt, pyqtSignal
+from PyQt6.QtWidgets import QLineEdit
+from src.local_db import get_products_by_barcodes
+from src.constants import SCAN_MAX_KEY_INTERVAL_MS, SCAN_MIN_LENGTH, SCAN_BATCH_WINDOW_MS
+
+############################################
+# Entrada del lector de códigos de barras
+############################################
+# Un lector "teclea" el código completo más Enter en pocos milisegundos.
+# Antes cada Enter se resolvía en el acto y un código desconocido abría un
+# QMessageBox modal que se tragaba los escaneos siguientes. Ahora:
+# - ScanInputFilter anota cada tecla con su hora; si el código llegó en ráfaga
+#   (todas las teclas a menos de SCAN_MAX_KEY_INTERVAL_MS) es un escaneo y se
+#   toma del buffer propio, tenga el foco el campo de búsqueda o la tabla.
+# - ScanQueue encola los códigos y cada SCAN_BATCH_WINDOW_MS los resuelve
+#   juntos con get_products_by_barcodes (una consulta), en orden de escaneo.
+# - Quien escucha 'resolved' aplica los productos al carrito y avisa los
+#   faltantes sin bloquear (ver toast.py).
+
+
+class ScanQueue(QObject):
+    """
+    Cola de códigos pendientes. Emite 'resolved(list)' con [(código, producto o None), ...]
+    en el mismo orden en que se encolaron.
+    """
+    resolved = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pending = deque()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(SCAN_BATCH_WINDOW_MS)
+        self.timer.timeout.connect(self.flush)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def enqueue(self, code: str):
+        code = code.strip()
+        if not code:
+            return
+        self._pending.append(code)
+        # No se reinicia: con escaneos continuos la espera máxima sigue acotada
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        """Resuelve todo lo pendiente en una consulta."""
+        self.timer.stop()
+        if not self._pending:
+            return
+        codes = list(self._pending)
+        self._pending.clear()
+        products = get_products_by_barcodes(codes)
+        self.resolved.emit([(code, products.get(code)) for code in codes])
+
+
+class ScanInputFilter(QObject):
+    """
+    Filtro de teclado para los widgets donde puede caer un escaneo.
+    Emite 'scanned(código)' por cada ráfaga terminada en Enter; el Enter de un
+    escaneo no llega al widget (returnPressed no se dispara dos veces).
+    """
+    scanned = pyqtSignal(str)
+
+    ENTER_KEYS = (Qt.Key.Key_Return, Qt.Key.Key_Enter)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._chars = []
+        self._last_key_at = 0.0
+
+    def watch(self, widget):
+        widget.installEventFilter(self)
+
+    def in_burst(self) -> bool:
+        """True mientras está entrando un código a velocidad de lector."""
+        return (len(self._chars) >= 2
+                and (time.perf_counter() - self._last_key_at) * 1000 <= SCAN_MAX_KEY_INTERVAL_MS)
+
+    def eventFilter(self, obj, event):
+        if event.type() != QEvent.Type.KeyPress:
+            return False
+
+        now = time.perf_counter()
+        gap_ms = (now - self._last_key_at) * 1000
+        if event.key() in self.ENTER_KEYS:
+            code = "".join(self._chars).strip()
+            is_scan = len(code) >= SCAN_MIN_LENGTH and gap_ms <= SCAN_MAX_KEY_INTERVAL_MS
+            self._reset()
+            if not is_scan:
+                return False  # Enter de una persona: lo atiende el widget
+            if isinstance(obj, QLineEdit):
+                obj.clear()
+            self.scanned.emit(code)
+            return True
+
+        text = event.text()
+        if not text or not text.isprintable():
+            if event.key() not in (Qt.Key.Key_Shift, Qt.Key.Key_Control, Qt.Key.Key_Alt):
+                self._reset()
+            return False
+
+        if self._chars and gap_ms > SCAN_MAX_KEY_INTERVAL_MS:
+            # Pausa de persona: lo escrito hasta ahora no es parte de una ráfaga,
+            # pero esta tecla puede ser el inicio de un escaneo
+            self._chars = []
+        self._chars.append(text)
+        self._last_key_at = now
+        # Fuera del campo de búsqueda las teclas del escaneo no deben mover la tabla
+        return not isinstance(obj, QLineEdit)
+
+    def _reset(self):
+        self._chars = []
@@ -0,0 +1,56 @@
+# startup_orchestrator.py
+
+import time
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from src.check_cash_register_status_worker import CheckCashRegisterStatusWorker
+from src.sync_scheduler import get_sync_scheduler
+
+############################################
+# Arranque tras el login
+############################################
+# Antes LoginWindow sincronizaba todo el catálogo, después consultaba el
+# estado de la caja y recién ahí abría una ventana: el cajero esperaba la
+# suma de ambos pasos. Ahora las dos cosas salen a la vez por el motor de red
+# (el estado de la caja con prioridad INTERACTIVE, la sincronización con
+# SYNC) y la ventana se abre apenas se conoce el estado, con el catálogo
+# local que ya había. La sincronización la lleva el SyncScheduler de la
+# aplicación, así que sigue en segundo plano con el POS abierto y éste
+# muestra su avance.
+
+
+class PostLoginStartup(QObject):
+    """
+    Emite 'status_ready(resultado)' con el dict de /cash-register/status (o la
+    excepción) en cuanto responde, sin esperar a la sincronización.
+    """
+    status_ready = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.status_worker = None
+        self._started_at = 0.0
+
+    def start(self):
+        self._started_at = time.perf_counter()
+
+        # Catálogo: una sincronización ya (se fusiona con la que estuviera en curso)
+        scheduler = get_sync_scheduler()
+        scheduler.sync_finished.connect(self._on_first_sync_finished)
+        scheduler.start()
+        scheduler.trigger_now()
+
+        self.status_worker = CheckCashRegisterStatusWorker()
+        self.status_worker.finished.connect(self._on_status_finished)
+        self.status_worker.start()
+
+    def _on_status_finished(self, result):
+        self.status_worker = None
+        elapsed = (time.perf_counter() - self._started_at) * 1000
+        print(f"DEBUG: estado de la caja en {elapsed:.0f} ms; el catálogo sigue en segundo plano.")
+        self.status_ready.emit(result)
+
+    def _on_first_sync_finished(self, _):
+        get_sync_scheduler().sync_finished.disconnect(self._on_first_sync_finished)
+        elapsed = (time.perf_counter() - self._started_at) * 1000
+        print(f"DEBUG: primera sincronización tras el login en {elapsed:.0f} ms.")
@@ -0,0 +1,77 @@
+# startup_timeline.py
+
+import json
+import sys
+import time
+
+from src.constants import STARTUP_LOG_FILE, STARTUP_SLOW_MS
+
+############################################
+# Línea de tiempo del arranque
+############################################
+# main.py importa este módulo antes que nada (sólo usa la biblioteca estándar)
+# y marca cada etapa con mark(). Cuando la primera ventana se pinta por
+# primera vez se cierra la medición: se anota una línea JSON en
+# STARTUP_LOG_FILE con el tiempo hasta la primera ventana y cada etapa, p. ej.
+#   {"at": "2025-03-01 08:02:11", "first_window_ms": 412.3, "frozen": true,
+#    "marks": {"imports": 95.1, "qapplication": 160.4, "init_db": 171.9, ...}}
+# No incluye lo anterior a main.py (arranque del intérprete / del bootloader
+# de PyInstaller). Para ver qué importación pesa: python -X importtime src/main.py
+
+_T0 = time.perf_counter()
+_marks = {}
+_window_filter = None
+
+
+def mark(label: str):
+    """Anota cuántos ms pasaron desde el inicio de main.py hasta 'label'."""
+    _marks[label] = round((time.perf_counter() - _T0) * 1000, 1)
+
+
+def marks() -> dict:
+    return dict(_marks)
+
+
+def watch_first_window(widget, then=None):
+    """
+    Cierra la medición cuando 'widget' se pinta por primera vez y luego llama
+    a 'then()' (trabajo que puede esperar a que la ventana esté en pantalla).
+    """
+    global _window_filter
+    from PyQt6.QtCore import QObject, QEvent, QTimer
+
+    class _FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint:
+                obj.removeEventFilter(self)
+                finish(type(obj).__name__)
+                if then is not None:
+                    QTimer.singleShot(0, then)  # Después de terminar este pintado
+            return False
+
+    _window_filter = _FirstPaint(widget)
+    widget.installEventFilter(_window_filter)
+
+
+def finish(window_name: str = ""):
+    """Registra el tiempo hasta la primera ventana (sólo la primera vez)."""
+    if "first_window" in _marks:
+        return
+    mark("first_window")
+    total = _marks["first_window"]
+    entry = {
+        "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "first_window_ms": total,
+        "window": window_name,
+        "frozen": hasattr(sys, "_MEIPASS"),
+        "marks": marks()
+    }
+
+    steps = ", ".join(f"{label} {ms:.0f}" for label, ms in _marks.items())
+    slow = " (LENTO)" if total >= STARTUP_SLOW_MS else ""
+    print(f"DEBUG: primera ventana en {total:.0f} ms{slow} ({steps}).")
+    try:
+        with open(STARTUP_LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"DEBUG: no se pudo escribir {STARTUP_LOG_FILE}: {e}")
@@ -1,21 +1,356 @@
 # sync.py
 
-import datetime
-from src.utils import request_with_refresh
-from src.local_db import init_db, save_products
+import email.utils
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-def sync_all_products():
+from src.utils import request_with_refresh, remember_validators, forget_validators
+from src.local_db import (
+    save_products, delete_products,
+    begin_staging, stage_products, commit_staging, discard_staging, StagingRejected,
+    count_products, get_meta, set_meta, delete_meta
+)
+from src.db_connection import run_maintenance
+from src import catalog_snapshot, catalog_bootstrap
+from src.constants import CATALOG_SNAPSHOT_ENABLED, SYNC_PAGE_SIZE, SYNC_MAX_CONCURRENCY
+
+# Clave en la tabla meta con el cursor de la última sincronización aplicada
+PRODUCTS_CURSOR_KEY = "products_cursor"
+
+# Claves de los ETag/Last-Modified guardados (ver utils.remember_validators).
+# Los del delta van por cursor ("products:delta:<cursor>"); los de la completa
+# por página ("products:full:<página>", más "products:full:pages").
+DELTA_VALIDATOR_KEY = "products:delta"
+FULL_VALIDATOR_KEY = "products:full"
+
+# Respuestas con las que la API indica que el cursor ya no sirve
+INVALID_CURSOR_CODES = (400, 404, 410, 422)
+
+
+class SyncError(Exception):
+    """
+    Error HTTP durante la sincronización. 'retry_after' trae los segundos que
+    la API pidió esperar (cabecera Retry-After), o None.
+    """
+
+    def __init__(self, message: str, status_code: int = None, retry_after: float = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class SyncCancelled(Exception):
+    """La sincronización se interrumpió porque se pidió detenerla (cierre de la app)."""
+
+
+def _check_stop(should_stop):
+    if should_stop and should_stop():
+        raise SyncCancelled("Sincronización cancelada.")
+
+
+def _parse_retry_after(value):
+    """Retry-After puede venir en segundos o como fecha HTTP."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _raise_sync_error(response, page: int):
+    raise SyncError(
+        f"Error al descargar la página {page} de productos. Código: {response.status_code}",
+        status_code=response.status_code,
+        retry_after=_parse_retry_after(response.headers.get("Retry-After"))
+    )
+
+
+def _is_tombstone(item: dict) -> bool:
+    return bool(item.get("deleted") or item.get("deleted_at"))
+
+
+class _CursorTracker:
+    """
+    Calcula el cursor para la próxima sincronización: el 'cursor' que entrega
+    la API o, si no viene, el mayor 'updated_at' recibido.
+    """
+
+    def __init__(self):
+        self.api_cursor = None
+        self.max_updated_at = None
+
+    def add_page(self, data: dict, items: list):
+        if data.get("cursor"):
+            self.api_cursor = str(data["cursor"])
+        for item in items:
+            stamp = item.get("updated_at")
+            if stamp and (self.max_updated_at is None or stamp > self.max_updated_at):
+                self.max_updated_at = stamp
+
+    @property
+    def value(self):
+        return self.api_cursor or self.max_updated_at
+
+
+############################################
+# Descarga paginada
+############################################
+def _fetch_page(params: dict, page: int, validator_key: str = None):
+    """Pide una página de /products y retorna la respuesta HTTP."""
+    return request_with_refresh(
+        "GET", "/products",
+        params=dict(params, page=page, per_page=SYNC_PAGE_SIZE),
+        validator_key=validator_key
+    )
+
+
+def _unchanged_stats(mode: str) -> dict:
+    """Contadores para un 304: la API confirmó que no hubo cambios."""
+    print("Catálogo sin cambios (304), no se descargó nada.")
+    return {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0, "mode": mode}
+
+
+def _delta_validator_key(cursor: str) -> str:
+    """Un ETag del delta sólo vale para el cursor con el que se pidió."""
+    return f"{DELTA_VALIDATOR_KEY}:{cursor}"
+
+
+def _page_validator_key(page: int) -> str:
+    return f"{FULL_VALIDATOR_KEY}:{page}"
+
+
+def _remember_full_validators(responses: dict):
     """
-    Sincroniza TODOS los productos desde /products a la base local.
-    Si la API está paginada, deberás iterar las páginas.
+    Guarda los validadores de cada página de una completa ya aplicada, y
+    cuántas páginas eran, para que la próxima pueda confirmar un 304.
     """
-    init_db()  # Asegurarnos de tener la tabla
+    _forget_full_validators()
+    for page, response in responses.items():
+        remember_validators(_page_validator_key(page), response)
+    set_meta(f"{FULL_VALIDATOR_KEY}:pages", len(responses))
+
+
+def _forget_full_validators():
+    for page in range(1, int(get_meta(f"{FULL_VALIDATOR_KEY}:pages") or 1) + 1):
+        forget_validators(_page_validator_key(page))
+    delete_meta(f"{FULL_VALIDATOR_KEY}:pages")
+
+
+def _other_pages_unchanged() -> bool:
+    """
+    Tras un 304 en la página 1 de una completa, pide las páginas 2..N con sus
+    validadores: el catálogo está al día sólo si todas responden 304. (La
+    página 1 trae el total / last_page, así que si cambió la cantidad de
+    páginas su ETag ya no coincide.)
+    """
+    pages = int(get_meta(f"{FULL_VALIDATOR_KEY}:pages") or 1)
+    if pages == 1:
+        return True
+    with ThreadPoolExecutor(max_workers=SYNC_MAX_CONCURRENCY, thread_name_prefix="sync-page") as pool:
+        statuses = pool.map(
+            lambda page: _fetch_page({}, page, _page_validator_key(page)).status_code,
+            range(2, pages + 1)
+        )
+        return all(status == 304 for status in statuses)
+
+
+def _fetch_page_json(params: dict, page: int, responses: dict = None) -> dict:
+    response = _fetch_page(params, page)
+    if response.status_code != 200:
+        _raise_sync_error(response, page)
+    if responses is not None:
+        responses[page] = response  # Validadores a guardar cuando se apliquen los datos
+    return response.json()
+
+
+def _page_count(data: dict) -> int:
+    """Total de páginas según la respuesta ('last_page', o 'total' / 'per_page')."""
+    if data.get("last_page"):
+        return int(data["last_page"])
+    total = data.get("total")
+    per_page = data.get("per_page") or len(data.get("items", []))
+    if total and per_page:
+        return math.ceil(int(total) / int(per_page))
+    return 1
+
+
+def _iter_pages(params: dict, first_page: dict, progress_callback=None, should_stop=None,
+                responses: dict = None):
+    """
+    Genera el JSON de cada página a medida que llega (no en orden).
+    Las páginas 2..N se descargan en paralelo, con a lo sumo
+    SYNC_MAX_CONCURRENCY en vuelo, y se entregan en ESTE hilo para que las
+    escrituras a SQLite no salgan del hilo de sincronización. Así la memoria
+    queda acotada a unas pocas páginas sin importar el tamaño del catálogo.
+    Lanza SyncCancelled entre una página y otra si 'should_stop()' es True.
+    Si se pasa 'responses', se llena con {página: respuesta} de las páginas 2..N.
+    """
+    total_pages = _page_count(first_page)
+    done = 1
+    yield first_page
+    if progress_callback:
+        progress_callback(done, total_pages)
+
+    pending = iter(range(2, total_pages + 1))
+    with ThreadPoolExecutor(max_workers=SYNC_MAX_CONCURRENCY, thread_name_prefix="sync-page") as pool:
+        in_flight = set()
+        for _, page in zip(range(SYNC_MAX_CONCURRENCY), pending):
+            in_flight.add(pool.submit(_fetch_page_json, params, page, responses))
+
+        while in_flight:
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                data = future.result()  # Propaga el error de la página
+                _check_stop(should_stop)
+                next_page = next(pending, None)
+                if next_page is not None:
+                    in_flight.add(pool.submit(_fetch_page_json, params, next_page, responses))
+                done += 1
+                yield data
+                if progress_callback:
+                    progress_callback(done, total_pages)
+
+
+############################################
+# Sincronización
+############################################
+def sync_all_products(progress_callback=None, should_stop=None):
+    """
+    Sincroniza los productos desde /products a la base local, página por página.
+    Si hay un cursor guardado pide sólo los cambios desde entonces
+    (incluidos los productos eliminados); si no lo hay o la API lo rechaza,
+    descarga el catálogo completo. Con la base vacía intenta primero bajar el
+    snapshot SQLite de la API (ver catalog_bootstrap.py).
+    'progress_callback(páginas_listas, total_páginas)' se llama tras guardar cada página.
+    'should_stop()' se consulta entre páginas: si retorna True se lanza
+    SyncCancelled (lo ya guardado queda; el cursor no avanza).
+    Retorna {'inserted', 'updated', 'deleted', 'unchanged', 'mode'} ('delta', 'full' o 'snapshot');
+    lanza SyncError si la API responde con error o si una completa borraría
+    buena parte del catálogo (ver local_db.commit_staging).
+    """
+    cursor = get_meta(PRODUCTS_CURSOR_KEY)
+    stats = None
+    if cursor:
+        stats = _delta_sync(cursor, progress_callback, should_stop)
+    elif count_products() == 0:
+        stats = _snapshot_sync(progress_callback, should_stop)
+    if stats is None:
+        _check_stop(should_stop)
+        stats = _full_sync(progress_callback, should_stop)
+
+    print(
+        f"Sincronización {stats['mode']}: "
+        f"{stats['inserted']} nuevos, {stats['updated']} actualizados, "
+        f"{stats['deleted']} eliminados, {stats['unchanged']} sin cambios."
+    )
+    if CATALOG_SNAPSHOT_ENABLED and not catalog_snapshot.is_current():
+        catalog_snapshot.write_snapshot()  # Búsquedas por barcode sin consultar SQLite
+    run_maintenance()  # ANALYZE/optimize como máximo cada pocas horas
+    return stats
+
+
+def _add_stats(total: dict, stats: dict):
+    for key, value in stats.items():
+        total[key] = total.get(key, 0) + value
+
+
+def _delta_sync(cursor: str, progress_callback=None, should_stop=None):
+    """Aplica los cambios desde 'cursor'. Retorna None si hay que hacer una sincronización completa."""
+    params = {"updated_since": cursor}
+    validator_key = _delta_validator_key(cursor)
+    response = _fetch_page(params, 1, validator_key)
+    if response.status_code == 304:
+        return _unchanged_stats("delta")
+    if response.status_code in INVALID_CURSOR_CODES:
+        print(f"Cursor de sincronización inválido (código {response.status_code}), sincronización completa.")
+        delete_meta(PRODUCTS_CURSOR_KEY)
+        forget_validators(validator_key)
+        return None
+    if response.status_code != 200:
+        _raise_sync_error(response, 1)
+
+    first_page = response.json()
+    stats = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    cursor_tracker = _CursorTracker()
+    for data in _iter_pages(params, first_page, progress_callback, should_stop):
+        items = data.get("items", [])
+        tombstones = [item["id"] for item in items if _is_tombstone(item)]
+        tombstones += data.get("deleted_ids", [])
+
+        _add_stats(stats, save_products([item for item in items if not _is_tombstone(item)]))
+        if tombstones:
+            stats["deleted"] += delete_products(tombstones)
+        cursor_tracker.add_page(data, items)
+
+    stats["mode"] = "delta"
+    forget_validators(validator_key)
+    if cursor_tracker.value and cursor_tracker.value != cursor:
+        set_meta(PRODUCTS_CURSOR_KEY, cursor_tracker.value)  # El próximo delta es otra consulta
+    elif _page_count(first_page) == 1:
+        remember_validators(validator_key, response)  # Mismo cursor: un 304 vale la próxima vez
+    return stats
+
+
+def _snapshot_sync(progress_callback=None, should_stop=None):
+    """Carga inicial desde el snapshot. Retorna None si no se pudo (se sigue con la completa)."""
+    try:
+        result = catalog_bootstrap.bootstrap_catalog(progress_callback, should_stop)
+    except Exception as e:
+        print(f"No se pudo cargar el snapshot del catálogo ({e}), sincronización completa.")
+        return None
+    if result is None:
+        return None
+
+    stats, cursor = result
+    stats["mode"] = "snapshot"
+    if cursor:
+        set_meta(PRODUCTS_CURSOR_KEY, str(cursor))
+    return stats
+
+
+def _full_sync(progress_callback=None, should_stop=None):
+    """Descarga el catálogo completo y lo reemplaza (incluye eliminar los que ya no existen)."""
+    response = _fetch_page({}, 1, _page_validator_key(1))
+    if response.status_code == 304:
+        if _other_pages_unchanged():
+            return _unchanged_stats("full")
+        # Cambió alguna otra página: descargar todo, sin condiciones
+        _forget_full_validators()
+        response = _fetch_page({}, 1)
+    if response.status_code != 200:
+        _raise_sync_error(response, 1)
+
+    first_page = response.json()
+
+    # El catálogo nuevo se arma aparte y se intercambia de una vez al final,
+    # así las búsquedas nunca ven precios viejos y nuevos mezclados
+    begin_staging()
+    cursor_tracker = _CursorTracker()
+    responses = {1: response}
+    try:
+        # Estructura de cada página: { 'items': [...], 'total': ..., 'last_page': ..., 'cursor': ... }
+        for data in _iter_pages({}, first_page, progress_callback, should_stop, responses):
+            items = [item for item in data.get("items", []) if not _is_tombstone(item)]
+            stage_products(items)
+            cursor_tracker.add_page(data, items)
+        stats = commit_staging()
+    except StagingRejected as e:
+        # Se informa como error de sincronización (reintento con backoff), no como éxito
+        raise SyncError(str(e)) from e
+    except Exception:
+        discard_staging()
+        raise
+    stats["mode"] = "full"
 
-    response = request_with_refresh("GET", "/products")
-    if response.status_code == 200:
-        data = response.json()
-        items = data.get("items", [])  # Estructura: { 'items': [...], 'total': ... }
-        save_products(items)
-        print(f"Sincronizados {len(items)} productos a SQLite.")
+    if cursor_tracker.value:
+        set_meta(PRODUCTS_CURSOR_KEY, cursor_tracker.value)
     else:
-        print(f"Error al sincronizar productos. Código: {response.status_code}")
+        delete_meta(PRODUCTS_CURSOR_KEY)  # La API no entrega cursor: seguir con completas
+    _remember_full_validators(responses)
+    return stats
@@ -0,0 +1,147 @@
+# sync_scheduler.py
+
+import random
+
+from PyQt6.QtCore import QObject, QTimer, QCoreApplication, pyqtSignal
+from src.sync_worker import SyncWorker
+from src.circuit_breaker import can_attempt
+from src.constants import SYNC_INTERVAL_MS, NETWORK_SHUTDOWN_TIMEOUT_S
+
+
+class SyncScheduler(QObject):
+    """
+    Programa la sincronización de productos siempre en segundo plano
+    (SyncWorker en el motor de red).
+    - Nunca hay dos sincronizaciones a la vez: si se pide una mientras otra
+      corre, se ejecuta UNA más al terminar (se fusionan los pedidos).
+    - El intervalo se ajusta solo: se acorta si la última sincronización trajo
+      cambios, se alarga si no, y crece exponencialmente ante errores.
+    - Respeta Retry-After cuando la API lo envía.
+    - Agrega jitter para que las cajas no consulten la API todas al mismo tiempo.
+    - Sin conexión no intenta nada hasta que el circuit breaker deja pasar la
+      petición de prueba (que puede ser la suya); al volver la conexión se
+      llama trigger_now().
+    Hay uno solo por aplicación (get_sync_scheduler()): la sincronización que
+    arranca tras el login sigue corriendo cuando se abre el POS.
+    """
+    sync_started = pyqtSignal()
+    sync_progress = pyqtSignal(int, int)
+    sync_finished = pyqtSignal(object)
+
+    JITTER = 0.2                         # ±20 % sobre cada intervalo
+    MIN_INTERVAL_MS = 30 * 1000
+    MAX_INTERVAL_MS = 10 * 60 * 1000
+
+    def __init__(self, parent=None, base_interval_ms: int = SYNC_INTERVAL_MS):
+        super().__init__(parent)
+        self.base_interval_ms = base_interval_ms
+        self.interval_ms = base_interval_ms
+        self.failures = 0
+        self.worker = None
+        self.progress = (0, 0)  # (páginas listas, total) de la sincronización en curso
+        self._pending = False
+        self._stopped = False
+        self._not_before_ms = 0  # Piso que impone Retry-After (sin jitter hacia abajo)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.trigger_now)
+
+    @property
+    def is_running(self) -> bool:
+        return self.worker is not None
+
+    def start(self, initial_delay_ms: int | None = None):
+        """Programa la primera sincronización (por defecto, tras un intervalo)."""
+        self._stopped = False
+        self._schedule(self.interval_ms if initial_delay_ms is None else initial_delay_ms)
+
+    def stop(self, timeout: float = NETWORK_SHUTDOWN_TIMEOUT_S):
+        """
+        Detiene el timer y cancela la sincronización en curso (corta entre
+        páginas), esperándola a lo sumo 'timeout' segundos.
+        """
+        self._stopped = True
+        self._pending = False
+        self.timer.stop()
+        if self.worker is not None:
+            self.worker.cancel()
+            if self.worker.wait(timeout):
+                self.worker = None  # Cancelada: su 'finished' no llega
+            else:
+                print(f"DEBUG: la sincronización sigue en curso tras {timeout} s.")
+
+    def trigger_now(self):
+        """Sincroniza ya, o justo después de la sincronización en curso."""
+        if self._stopped:
+            return
+        if self.worker is not None and self.worker.is_cancelled and not self.worker.isRunning():
+            self.worker = None  # Cancelada en stop() y terminada después
+        if self.worker is not None:
+            self._pending = True
+            return
+        if not can_attempt():
+            self._schedule(self.interval_ms)
+            return
+
+        self.timer.stop()
+        self.progress = (0, 0)
+        self.worker = SyncWorker()
+        self.worker.progress.connect(self._on_worker_progress)
+        self.worker.finished.connect(self._on_worker_finished)
+        self.sync_started.emit()
+        self.worker.start()
+
+    def _on_worker_progress(self, done: int, total: int):
+        self.progress = (done, total)
+        self.sync_progress.emit(done, total)
+
+    def _on_worker_finished(self, result):
+        self.worker = None
+
+        delay_ms = self._next_delay_ms(result)
+        self.sync_finished.emit(result)
+        if self._stopped:
+            return
+
+        if self._pending:
+            self._pending = False
+            self.trigger_now()
+        else:
+            self._schedule(delay_ms)
+
+    def _next_delay_ms(self, result) -> int:
+        """Calcula la espera hasta la próxima sincronización según el resultado."""
+        if isinstance(result, Exception):
+            self.failures += 1
+            retry_after = getattr(result, "retry_after", None)
+            if retry_after is not None:
+                self._not_before_ms = int(retry_after * 1000)
+                return self._not_before_ms
+            return min(self.base_interval_ms * (2 ** self.failures), self.MAX_INTERVAL_MS)
+
+        self.failures = 0
+        changes = 0
+        if isinstance(result, dict):
+            changes = result.get("inserted", 0) + result.get("updated", 0) + result.get("deleted", 0)
+        if changes:
+            self.interval_ms = max(self.MIN_INTERVAL_MS, self.interval_ms // 2)
+        else:
+            self.interval_ms = min(self.MAX_INTERVAL_MS, int(self.interval_ms * 1.5))
+        return self.interval_ms
+
+    def _schedule(self, delay_ms: int):
+        jitter = random.uniform(1 - self.JITTER, 1 + self.JITTER)
+        self.timer.start(max(1000, int(delay_ms * jitter), self._not_before_ms))
+        self._not_before_ms = 0
+
+
+_scheduler = None
+
+
+def get_sync_scheduler() -> SyncScheduler:
+    """Scheduler compartido; se crea en el primer uso (desde el hilo de la GUI) y vive lo que la app."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = SyncScheduler(QCoreApplication.instance())
+    return _scheduler
@@ -1,15 +1,15 @@
-from PyQt6.QtCore import QThread, pyqtSignal
+from src.network_engine import NetworkTask, Priority
 from src.sync import sync_all_products
 
 
-class SyncWorker(QThread):
-    """Hilo para sincronizar productos con la nube."""
-    finished = pyqtSignal(object)
+class SyncWorker(NetworkTask):
+    """Tarea de red para sincronizar productos con la nube."""
+    priority = Priority.SYNC
+    # 'progress' emite (páginas listas, total de páginas)
 
     def run(self):
-        """Ejecuta la sincronización en un hilo secundario."""
-        try:
-            result = sync_all_products()
-            self.finished.emit(result)  # Emite el resultado si todo va bien
-        except Exception as e:
-            self.finished.emit(e)  # Emite el error en caso de fallo
+        """Ejecuta la sincronización en un hilo del motor de red."""
+        return sync_all_products(
+            progress_callback=self.progress.emit,
+            should_stop=lambda: self.is_cancelled
+        )
@@ -0,0 +1,41 @@
+# toast.py
+
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import QLabel, QApplication
+from src.constants import TOAST_DURATION_MS
+
+
+class Toast(QLabel):
+    """
+    Aviso flotante y no modal sobre la parte superior de 'parent': no toma el
+    foco ni bloquea el teclado, así el lector puede seguir escaneando.
+    Se oculta solo tras TOAST_DURATION_MS; un aviso nuevo reemplaza al anterior.
+    """
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setObjectName("Toast")
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.setWordWrap(True)
+        self.setStyleSheet(
+            "QLabel#Toast { background-color: #dc3545; color: white; font-weight: bold;"
+            " border-radius: 6px; padding: 10px 16px; }"
+        )
+        self.hide()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.hide)
+
+    def show_message(self, text: str, beep: bool = False):
+        self.setText(text)
+        width = min(max(300, self.parentWidget().width() // 2), self.parentWidget().width())
+        self.setFixedWidth(width)
+        self.adjustSize()
+        self.move((self.parentWidget().width() - width) // 2, 16)
+        self.raise_()
+        self.show()
+        self.timer.start(TOAST_DURATION_MS)
+        if beep:
+            QApplication.beep()
@@ -0,0 +1,178 @@
+# token_store.py
+
+import base64
+import json
+import threading
+import time
+
+import requests
+from src.constants import (
+    ACCESS_TOKEN_FILE,
+    REFRESH_TOKEN_FILE,
+    HOST_FILE,
+    TOKEN_REFRESH_MARGIN_S
+)
+
+############################################
+# Credenciales en memoria
+############################################
+# Los tokens y el host se leen del disco una sola vez y quedan en memoria;
+# al cambiar se escriben de forma atómica (ver utils.write_file).
+# El refresh es "single-flight": si varios hilos reciben 401 a la vez, sólo
+# uno llama a /auth/refresh y los demás esperan su resultado. Así el refresh
+# token rotativo se usa una sola vez.
+
+
+def _jwt_expiry(token: str) -> float | None:
+    """Retorna el 'exp' (epoch) de un JWT sin verificar la firma, o None si no es un JWT."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp is not None else None
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return None
+
+
+class TokenStore:
+    """
+    Caché thread-safe de access token, refresh token y host.
+    'send' es http_client.request; 'read' / 'write' son las funciones de
+    archivo de utils (se inyectan para no importar utils desde aquí).
+    """
+
+    REFRESH_RETRY_S = 30
+
+    def __init__(self, send, read, write):
+        self._send = send
+        self._read = read
+        self._write = write
+        self._cond = threading.Condition()
+        self._loaded = False
+        self._access = None
+        self._refresh = None
+        self._host = None
+        self._access_exp = None
+        # Estado del refresh en curso (single-flight)
+        self._refreshing = False
+        self._refresh_round = 0
+        self._last_refresh_ok = False
+        self._last_failure_at = 0.0
+
+    def _ensure_loaded(self):
+        # Llamar con self._cond tomado
+        if not self._loaded:
+            self._set_access(self._read(ACCESS_TOKEN_FILE))
+            self._refresh = self._read(REFRESH_TOKEN_FILE)
+            self._host = self._read(HOST_FILE)
+            self._loaded = True
+
+    def _set_access(self, token):
+        self._access = token
+        self._access_exp = _jwt_expiry(token) if token else None
+
+    ############################################
+    # Lectura
+    ############################################
+    @property
+    def access_token(self) -> str | None:
+        with self._cond:
+            self._ensure_loaded()
+            return self._access
+
+    @property
+    def host(self) -> str | None:
+        with self._cond:
+            self._ensure_loaded()
+            return self._host
+
+    def credentials(self) -> tuple[str | None, str | None]:
+        """
+        Retorna (access_token, host) para una petición. Si el JWT vence dentro
+        de TOKEN_REFRESH_MARGIN_S lo refresca antes, para no pagar un 401.
+        Tras un refresh fallido (p. ej. sin red) no se reintenta por adelantado
+        hasta pasado REFRESH_RETRY_S; la petición sale con el token actual.
+        """
+        with self._cond:
+            self._ensure_loaded()
+            access, host, exp = self._access, self._host, self._access_exp
+            cooling_down = time.time() - self._last_failure_at < self.REFRESH_RETRY_S
+        if (access and exp is not None and not cooling_down
+                and exp - time.time() < TOKEN_REFRESH_MARGIN_S):
+            if self.refresh(stale_token=access):
+                access = self.access_token
+        return access, host
+
+    ############################################
+    # Escritura
+    ############################################
+    def set_tokens(self, access_token: str, refresh_token: str):
+        """Guarda tokens nuevos (login o refresh) en memoria y en disco."""
+        with self._cond:
+            self._ensure_loaded()
+            self._write(ACCESS_TOKEN_FILE, access_token)
+            self._write(REFRESH_TOKEN_FILE, refresh_token)
+            self._set_access(access_token)
+            self._refresh = refresh_token
+
+    def set_host(self, host: str):
+        with self._cond:
+            self._ensure_loaded()
+            self._write(HOST_FILE, host)
+            self._host = host
+
+    ############################################
+    # Refresh single-flight
+    ############################################
+    def refresh(self, stale_token: str = None) -> bool:
+        """
+        Refresca los tokens. 'stale_token' es el access token con el que falló
+        la petición: si ya no es el vigente, otro hilo refrescó y no hace falta
+        repetirlo. Si hay un refresh en curso, espera su resultado.
+        """
+        with self._cond:
+            self._ensure_loaded()
+            if stale_token is not None and self._access and self._access != stale_token:
+                return True
+            if self._refreshing:
+                round_ = self._refresh_round
+                while self._refreshing and self._refresh_round == round_:
+                    self._cond.wait()
+                return self._last_refresh_ok
+            self._refreshing = True
+            refresh_token, host = self._refresh, self._host
+
+        ok = False
+        try:
+            ok = self._post_refresh(refresh_token, host)
+        finally:
+            with self._cond:
+                self._refreshing = False
+                self._refresh_round += 1
+                self._last_refresh_ok = ok
+                if not ok:
+                    self._last_failure_at = time.time()
+                self._cond.notify_all()
+        return ok
+
+    def _post_refresh(self, refresh_token: str, host: str) -> bool:
+        if not refresh_token or not host:
+            return False
+
+        headers = {
+            "Authorization": f"Bearer {refresh_token}",
+            "Accept": "application/json",
+            "Host": host
+        }
+        try:
+            r = self._send("POST", "/auth/refresh", headers=headers)
+            if r.status_code == 200:
+                data = r.json()
+                new_access = data.get("access_token")
+                new_refresh = data.get("refresh_token")
+                if new_access and new_refresh:
+                    self.set_tokens(new_access, new_refresh)
+                    return True
+        except (requests.RequestException, ValueError):
+            pass
+        return False
@@ -1,12 +1,16 @@
 # utils.py
 
+import gzip
+import json as jsonlib
+import os
 import requests
 from src.constants import (
-    API_BASE_URL,
-    ACCESS_TOKEN_FILE,
-    REFRESH_TOKEN_FILE,
-    HOST_FILE
+    HTTP_GZIP_REQUESTS,
+    HTTP_GZIP_MIN_BYTES
 )
+from src.local_db import get_meta, set_meta, delete_meta
+from src.token_store import TokenStore
+from src import http_client
 
 ############################################
 # Lectura / Escritura de archivos
@@ -19,54 +23,83 @@ def read_file(file_path: str) -> str | None:
         return None
 
 def write_file(file_path: str, content: str):
+    """Escribe de forma atómica: un corte de luz nunca deja el archivo a medias."""
+    tmp_path = f"{file_path}.tmp"
     try:
-        with open(file_path, "w", encoding="utf-8") as f:
+        with open(tmp_path, "w", encoding="utf-8") as f:
             f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
     except IOError as e:
         raise IOError(f"Error al escribir en el archivo: {file_path}. Detalle: {str(e)}")
 
 ############################################
 # SESIÓN GLOBAL PARA REUTILIZAR CONEXIÓN
 ############################################
-SESSION = requests.Session()
+# Pool, timeouts y reintentos en http_client.py
+SESSION = http_client.SESSION
+
+# Tokens y host en memoria (ver token_store.py)
+TOKENS = TokenStore(http_client.request, read_file, write_file)
 
 ############################################
 # Lógica de refresh token
 ############################################
-def attempt_refresh() -> bool:
-    refresh_token = read_file(REFRESH_TOKEN_FILE)
-    host = read_file(HOST_FILE)
-    if not refresh_token or not host:
-        return False
-
-    headers = {
-        "Authorization": f"Bearer {refresh_token}",
-        "Accept": "application/json",
-        "Host": host
-    }
+def attempt_refresh(stale_token: str = None) -> bool:
+    """Refresca los tokens; si otro hilo ya está refrescando, espera su resultado."""
+    return TOKENS.refresh(stale_token)
 
-    url = f"{API_BASE_URL}/auth/refresh"
-    try:
-        r = SESSION.post(url, headers=headers)
-        if r.status_code == 200:
-            data = r.json()
-            new_access = data.get("access_token")
-            new_refresh = data.get("refresh_token")
-            if new_access and new_refresh:
-                write_file(ACCESS_TOKEN_FILE, new_access)
-                write_file(REFRESH_TOKEN_FILE, new_refresh)
-                return True
-    except requests.RequestException:
-        pass
-
-    return False
-
-def request_with_refresh(method: str, endpoint: str, data=None, json=None, headers=None, **kwargs) -> requests.Response:
+############################################
+# Validadores HTTP (ETag / Last-Modified)
+############################################
+# Se guardan en la tabla meta bajo una clave elegida por el llamador
+# (p. ej. "products:delta"). El llamador decide cuándo guardarlos: recién
+# después de aplicar los datos, para que un 304 signifique "lo local ya está al día".
+def _validator_meta_key(validator_key: str) -> str:
+    return f"http_validators:{validator_key}"
+
+def get_validators(validator_key: str) -> dict:
+    raw = get_meta(_validator_meta_key(validator_key))
+    return jsonlib.loads(raw) if raw else {}
+
+def remember_validators(validator_key: str, response: requests.Response):
+    """Guarda ETag / Last-Modified de una respuesta 200 ya aplicada localmente."""
+    validators = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified")
+    }
+    if validators["etag"] or validators["last_modified"]:
+        set_meta(_validator_meta_key(validator_key), jsonlib.dumps(validators))
+    else:
+        forget_validators(validator_key)
+
+def forget_validators(validator_key: str):
+    delete_meta(_validator_meta_key(validator_key))
+
+def _gzip_json_body(json, headers: dict):
+    """Serializa 'json' y lo comprime con gzip si supera HTTP_GZIP_MIN_BYTES."""
+    body = jsonlib.dumps(json).encode("utf-8")
+    headers["Content-Type"] = "application/json"
+    if len(body) >= HTTP_GZIP_MIN_BYTES:
+        headers["Content-Encoding"] = "gzip"
+        return gzip.compress(body)
+    return body
+
+def request_with_refresh(method: str, endpoint: str, data=None, json=None, headers=None,
+                         validator_key: str = None, compress: bool = False, **kwargs) -> requests.Response:
+    """
+    Petición autenticada a la API, reintentando una vez tras refrescar el token si da 401.
+    - validator_key: en un GET envía If-None-Match / If-Modified-Since guardados con
+      remember_validators(); si nada cambió la respuesta es 304 sin cuerpo.
+    - compress: envía 'json' comprimido con gzip si es grande y HTTP_GZIP_REQUESTS está activo.
+    Las respuestas ya se piden comprimidas (requests envía Accept-Encoding: gzip).
+    Timeouts, reintentos y latencia: ver http_client.request.
+    """
     if headers is None:
         headers = {}
 
-    access_token = read_file(ACCESS_TOKEN_FILE)
-    host = read_file(HOST_FILE)
+    access_token, host = TOKENS.credentials()
 
     if not access_token or not host:
         raise Exception("No hay token de acceso o host configurado.")
@@ -75,16 +108,25 @@ def request_with_refresh(method: str, endpoint: str, data=None, json=None, heade
     headers["Host"] = host
     headers["Accept"] = "application/json"
 
-    url = f"{API_BASE_URL}{endpoint}"
+    if validator_key and method.upper() == "GET":
+        validators = get_validators(validator_key)
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    if compress and HTTP_GZIP_REQUESTS and json is not None:
+        data = _gzip_json_body(json, headers)
+        json = None
 
-    response = SESSION.request(method, url, data=data, json=json, headers=headers, **kwargs)
+    response = http_client.request(method, endpoint, data=data, json=json, headers=headers, **kwargs)
 
     # Si 401 => intentar refresh
     if response.status_code == 401:
-        if attempt_refresh():
-            new_access_token = read_file(ACCESS_TOKEN_FILE)
+        if attempt_refresh(stale_token=access_token):
+            new_access_token = TOKENS.access_token
             if new_access_token:
                 headers["Authorization"] = f"Bearer {new_access_token}"
-                response = SESSION.request(method, url, data=data, json=json, headers=headers, **kwargs)
+                response = http_client.request(method, endpoint, data=data, json=json, headers=headers, **kwargs)
 
     return response